@@ -114,15 +114,12 @@ class U8(WiiArchive):
         os.chdir(old)
         self._tmpPath = self._tmpPath[:self._tmpPath.find('/') + 1]
     def _load(self, data):
-        offset = 0
-
-        for i in range(len(data)):
-            header = self.U8Header()
-            header.unpack(data[offset:offset + len(header)])
-            if header.tag == b'U\xAA8-':
-                break
-            data = data[1:]
-        offset += len(header)
+        # skip anything before the header
+        start = data.find(b'U\xAA8-')
+        data = data[start:] if start >= 0 else data[:0]
+
+        header = self.U8Header()
+        header.unpack(data[:len(header)])
         offset = header.rootnode_offset
 
         #print(header.rootnode_offset)
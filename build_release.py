@@ -4,6 +4,7 @@
 import json
 import os, os.path
 import shutil
+import subprocess
 import sys
 
 import PyInstaller.__main__
@@ -302,11 +303,15 @@ else:
 for f in config.DATA_FOLDERS:
     if os.path.isdir(os.path.join(dest_folder, f)):
         shutil.rmtree(os.path.join(dest_folder, f))
-    shutil.copytree(f, os.path.join(dest_folder, f))
+    shutil.copytree(f, os.path.join(dest_folder, f), ignore=shutil.ignore_patterns('*.cache.pkl', 'databundle.pkl'))
 
 for f in config.DATA_FILES:
     shutil.copy(f, dest_folder)
 
+if config.POST_COPY_SCRIPT_ARGS is not None:
+    print('>> Running %s %s in the destination folder...' % (config.SCRIPT_FILE, ' '.join(config.POST_COPY_SCRIPT_ARGS)))
+    subprocess.check_call([sys.executable, os.path.abspath(config.SCRIPT_FILE)] + config.POST_COPY_SCRIPT_ARGS, cwd=dest_folder)
+
 
 ########################################################################
 ################################ Cleanup ###############################
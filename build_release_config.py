@@ -16,6 +16,9 @@ MAC_BUNDLE_IDENTIFIER = 'ca.chronometry.reggie'
 SCRIPT_FILE = 'reggie.py'
 DATA_FOLDERS = ['reggiedata', 'reggieextras']
 DATA_FILES = ['readme.md', 'license.txt']
+# Arguments to run SCRIPT_FILE with in the output folder once the data
+# files are copied there (or None)
+POST_COPY_SCRIPT_ARGS = ['-build-data-bundle']
 EXTRA_IMPORT_PATHS = []
 
 USE_PYQT = True
@@ -1,5 +1,4 @@
 import struct
-import ctypes
 
 class LZS11(object):
     def __init__(self):
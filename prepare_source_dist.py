@@ -8,7 +8,7 @@ print('>> Destination directory: %s' % dir)
 if os.path.isdir(dir): shutil.rmtree(dir)
 os.makedirs(dir)
 
-shutil.copytree('reggiedata', dir + '/reggiedata')
+shutil.copytree('reggiedata', dir + '/reggiedata', ignore=shutil.ignore_patterns('*.cache.pkl', 'databundle.pkl'))
 shutil.copytree('reggieextras', dir + '/reggieextras')
 shutil.copy('license.txt', dir)
 shutil.copy('readme.md', dir)
@@ -19,10 +19,16 @@
 # with this program; if not, write to the Free Software Foundation, Inc.,
 # 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 
-from ctypes import create_string_buffer
+import array
+import binascii
 import encodings # fixes "LookupError: no codec search functions
                  # registered: can't find encoding" on
                  # Py2+cx_Freeze+Linux
+import functools
+import io
+import itertools
+import math
+import operator
 import os.path
 import pickle
 import pickletools
@@ -30,7 +36,8 @@ import struct
 import sys
 import time
 import warnings
-from xml.dom import minidom
+import xml.etree.ElementTree as etree
+import zlib
 
 import archive
 import lz77
@@ -81,27 +88,21 @@ except ImportError:
 
 # Some Py2/Py3 compatibility helpers
 
+# (bytes are indexed through bytearray() wherever ints are needed, since
+# that behaves the same on both)
+
 if sys.version_info.major >= 3:
     unicode = str
-    intsToBytes = bytes
     unichr = chr
-
-    def keyInAttribs(key, node):
-        return key in node.attributes
+    intern = sys.intern
 
 else:
-
-    def intsToBytes(L):
-        return b''.join(chr(x) for x in L)
-
-    def keyInAttribs(key, node):
-        return node.attributes.has_key(key)
-
-_ord = ord
-def ord(x):
-    if isinstance(x, int):
-        return x
-    return _ord(x)
+    _intern = intern
+    def intern(s):
+        # Python 2 can only intern byte strings
+        if isinstance(s, str):
+            return _intern(s)
+        return s
 
 
 app = None
@@ -139,7 +140,9 @@ def IsNSMBLevel(filename):
     """Does some basic checks to confirm a file is a NSMB level"""
     if not os.path.isfile(filename): return False
     with open(filename, 'rb') as f:
-        data = f.read()
+        # the U8 file name table is right after the header, so there's
+        # no need to read the whole file
+        data = f.read(0x10000)
 
     if data.startswith(b'\x11'):
         # LZ-compressed -- not much we can do without decompressing it,
@@ -170,8 +173,17 @@ def FilesAreMissing():
 
     missing = []
 
+    # list each folder once instead of checking every file separately
+    listings = {}
     for check in required:
-        if not os.path.isfile('reggiedata/' + check):
+        folder, name = os.path.split(os.path.join('reggiedata', check))
+        if folder not in listings:
+            try:
+                listings[folder] = set(os.listdir(folder))
+            except OSError:
+                listings[folder] = set()
+
+        if name not in listings[folder]:
             missing.append(check)
 
     if len(missing) > 0:
@@ -181,9 +193,14 @@ def FilesAreMissing():
     return False
 
 
+IconCache = {}
 def GetIcon(name):
     """Helper function to grab a specific icon"""
-    return QtGui.QIcon('reggiedata/icon_%s.png' % name)
+    icon = IconCache.get(name)
+    if icon is None:
+        icon = QtGui.QIcon('reggiedata/icon_%s.png' % name)
+        IconCache[name] = icon
+    return icon
 
 
 def SetGamePath(newpath):
@@ -262,34 +279,171 @@ def setUpDarkMode():
     """)
 
 
+DataCacheVersion = 4
+def DataFileStamp(filename):
+    """
+    Returns a value that changes whenever the data file (or the format of
+    the data parsed from it) changes
+    """
+    st = os.stat(filename)
+    return (DataCacheVersion, st.st_mtime, st.st_size)
+
+
+def BundledFileStamp(filename):
+    """
+    Like DataFileStamp(), but for entries in the data bundle. Release
+    archives don't reliably keep modification times (zip rounds them to
+    2 seconds, and some extractors reset them), so this goes by the
+    file's contents instead
+    """
+    with open(filename, 'rb') as f:
+        data = f.read()
+    return (DataCacheVersion, len(data), zlib.crc32(data) & 0xFFFFFFFF)
+
+
+class DataCacheUnpickler(pickle.Unpickler):
+    """
+    Unpickler for the data bundle and cache files that only allows the
+    types the parsed data is made of, so a pickle dropped into
+    reggiedata can't run arbitrary code
+    """
+    AllowedGlobals = {
+        ('__main__', 'SpriteDefinition'), ('reggie', 'SpriteDefinition'),
+        ('builtins', 'set'), ('builtins', 'frozenset'),
+        ('__builtin__', 'set'), ('__builtin__', 'frozenset'),
+        ('array', 'array'), ('array', '_array_reconstructor'),
+        }
+
+    def find_class(self, module, name):
+        if (module, name) not in self.AllowedGlobals:
+            raise pickle.UnpicklingError('Unexpected global in cached data: %s.%s' % (module, name))
+        return pickle.Unpickler.find_class(self, module, name)
+
+
+def LoadDataPickle(f):
+    """Reads one pickle from a data bundle or cache file"""
+    return DataCacheUnpickler(f).load()
+
+
+DataBundle = None
+DataBundleFile = 'reggiedata/databundle.pkl'
+def LoadDataBundle():
+    """
+    Loads the pre-parsed data written by BuildDataBundle(), if there is
+    one. Returns a dict of filename -> (stamp, parsed data)
+    """
+    try:
+        with open(DataBundleFile, 'rb') as f:
+            return LoadDataPickle(f)
+    except Exception:
+        return {}
+
+
+def BuildDataBundle():
+    """
+    Parses all of the data files and saves the results to a single
+    pickle file, so that a release build doesn't need to parse anything
+    """
+    bundle = {}
+    for filename, parser in BundledDataFiles:
+        bundle[filename] = (BundledFileStamp(filename), parser(filename))
+    for name, builder in GeneratedTables:
+        bundle[name] = ((DataCacheVersion,), builder())
+
+    with open(DataBundleFile, 'wb') as f:
+        f.write(pickletools.optimize(pickle.dumps(bundle, pickle.HIGHEST_PROTOCOL)))
+
+
+def _LoadCached(key, stamp, cachename, producer, bundlestamp=None):
+    """
+    Returns producer(), reusing an up-to-date copy of the result from
+    the data bundle entry named key or from the pickle in cachename.
+    bundlestamp works out the stamp a bundle entry should have, if it
+    isn't just stamp
+    """
+    global DataBundle
+    if DataBundle is None:
+        DataBundle = LoadDataBundle()
+
+    bundled = DataBundle.get(key)
+    if bundled is not None and bundled[0] == (stamp if bundlestamp is None else bundlestamp()):
+        return bundled[1]
+
+    try:
+        with open(cachename, 'rb') as f:
+            if LoadDataPickle(f) == stamp:
+                return LoadDataPickle(f)
+    except Exception:
+        # missing, stale or unreadable (e.g. written by another Python
+        # version) -- just produce the result again
+        pass
+
+    result = producer()
+
+    try:
+        with open(cachename, 'wb') as f:
+            pickle.dump(stamp, f, pickle.HIGHEST_PROTOCOL)
+            f.write(pickletools.optimize(pickle.dumps(result, pickle.HIGHEST_PROTOCOL)))
+    except (IOError, OSError):
+        # the data folder might be read-only, which is fine
+        pass
+
+    return result
+
+
+def LoadCachedData(filename, parser):
+    """
+    Returns parser(filename), reusing an up-to-date copy of the result
+    from the data bundle or from a pickle stored next to the file
+    """
+    return _LoadCached(filename, DataFileStamp(filename), filename + '.cache.pkl',
+        lambda: parser(filename), lambda: BundledFileStamp(filename))
+
+
+def LoadGeneratedTable(name, builder):
+    """
+    Returns builder(), reusing a copy from the data bundle or from a
+    previous run. This is for fixed lookup tables that take longer to
+    build than to unpickle
+    """
+    return _LoadCached(name, (DataCacheVersion,), 'reggiedata/%s.cache.pkl' % name, builder)
+
+
 LevelNames = None
 def LoadLevelNames():
     """Ensures that the level name info is loaded"""
     global LevelNames
     if LevelNames is not None: return
 
-    with open('reggiedata/levelnames.txt') as f:
-        raw = [x.strip() for x in f.readlines()]
+    LevelNames = LoadCachedData('reggiedata/levelnames.txt', ParseLevelNames)
+
 
+def ParseLevelNames(filename):
+    """Parses the level name info from a file"""
     LevelNames = []
     CurrentWorldName = None
     CurrentWorld = None
 
-    for line in raw:
-        if line == '': continue
-        if line.startswith('-'):
-            if CurrentWorld is not None:
-                LevelNames.append((CurrentWorldName,CurrentWorld))
-
-            CurrentWorldName = line[1:]
-            CurrentWorld = []
-        else:
-            d = line.split('|')
-            CurrentWorld.append((d[0], d[1]))
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            first = line[:1]
+            if not first: continue
+            if first == '-':
+                if CurrentWorld is not None:
+                    LevelNames.append((CurrentWorldName,CurrentWorld))
+
+                CurrentWorldName = line[1:]
+                CurrentWorld = []
+            else:
+                levelname, _, level = line.partition('|')
+                CurrentWorld.append((levelname, level))
 
     if CurrentWorld is not None:
         LevelNames.append((CurrentWorldName,CurrentWorld))
 
+    return LevelNames
+
 
 TilesetNames = None
 def LoadTilesetNames():
@@ -297,32 +451,27 @@ def LoadTilesetNames():
     global TilesetNames
     if TilesetNames is not None: return
 
-    with open('reggiedata/tilesets.txt') as f:
-        raw = [x.strip() for x in f.readlines()]
+    TilesetNames = LoadCachedData('reggiedata/tilesets.txt', ParseTilesetNames)
+
 
-    TilesetNames = []
+def ParseTilesetNames(filename):
+    """Parses the tileset name info from a file"""
     StandardSuite = []
     StageSuite = []
     BackgroundSuite = []
     InteractiveSuite = []
+    suites = {'Pa0': StandardSuite, 'Pa1': StageSuite, 'Pa2': BackgroundSuite, 'Pa3': InteractiveSuite}
 
-    for line in raw:
-        if line.startswith('Pa0'):
-            w = line.split('=')
-            StandardSuite.append((w[0], w[1]))
-        if line.startswith('Pa1'):
-            w = line.split('=')
-            StageSuite.append((w[0], w[1]))
-        if line.startswith('Pa2'):
-            w = line.split('=')
-            BackgroundSuite.append((w[0], w[1]))
-        if line.startswith('Pa3'):
-            w = line.split('=')
-            InteractiveSuite.append((w[0], w[1]))
-    TilesetNames.append(StandardSuite)
-    TilesetNames.append(StageSuite)
-    TilesetNames.append(BackgroundSuite)
-    TilesetNames.append(InteractiveSuite)
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            suite = suites.get(line[:3])
+            if suite is None: continue
+
+            tsname, _, tsdesc = line.partition('=')
+            suite.append((tsname, tsdesc))
+
+    return [StandardSuite, StageSuite, BackgroundSuite, InteractiveSuite]
 
 
 ObjDesc = None
@@ -331,13 +480,22 @@ def LoadObjDescriptions():
     global ObjDesc
     if ObjDesc is not None: return
 
-    with open('reggiedata/ts1_descriptions.txt') as f:
-        raw = [x.strip() for x in f.readlines()]
+    ObjDesc = LoadCachedData('reggiedata/ts1_descriptions.txt', ParseObjDescriptions)
 
+
+def ParseObjDescriptions(filename):
+    """Parses the object descriptions from a file"""
     ObjDesc = {}
-    for line in raw:
-        w = line.split('=')
-        ObjDesc[int(w[0])] = w[1]
+
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            if not line: continue
+
+            key, _, desc = line.partition('=')
+            ObjDesc[int(key)] = desc
+
+    return ObjDesc
 
 
 BgANames = None
@@ -346,14 +504,7 @@ def LoadBgANames():
     global BgANames
     if BgANames is not None: return
 
-    with open('reggiedata/bga.txt') as f:
-        raw = [x.strip() for x in f.readlines()]
-
-    BgANames = []
-
-    for line in raw:
-        w = line.split('=')
-        BgANames.append([w[0], w[1]])
+    BgANames = LoadCachedData('reggiedata/bga.txt', ParseBgNames)
 
 
 BgBNames = None
@@ -362,15 +513,22 @@ def LoadBgBNames():
     global BgBNames
     if BgBNames is not None: return
 
-    with open('reggiedata/bgb.txt') as f:
-        raw = [x.strip() for x in f.readlines()]
+    BgBNames = LoadCachedData('reggiedata/bgb.txt', ParseBgNames)
+
 
-    BgBNames = []
+def ParseBgNames(filename):
+    """Parses the background name info from a file"""
+    BgNames = []
 
-    for line in raw:
-        w = line.split('=')
-        BgBNames.append([w[0], w[1]])
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            if not line: continue
 
+            bfile, _, bname = line.partition('=')
+            BgNames.append([bfile, bname])
+
+    return BgNames
 
 
 
@@ -393,6 +551,8 @@ ZoneTerrainThemeValues = [
 Sprites = None
 SpriteCategories = None
 
+FieldCommentTemplate = '<b>%s</b>:<br>%s'
+
 class SpriteDefinition():
     """Stores and manages the data info for a specific sprite"""
 
@@ -423,55 +583,69 @@ class SpriteDefinition():
             return None
 
 
+    def getListModel(self, i):
+        """
+        Returns the model for the list field at index i. Most sprites are
+        never edited, so models are only created when first needed
+        """
+        f = self.fields[i]
+        model = f[3]
+        if not isinstance(model, SpriteDefinition.ListPropertyModel):
+            model = SpriteDefinition.ListPropertyModel(*model)
+            self.fields[i] = (f[0], f[1], f[2], model, f[4])
+        return model
+
+
     def loadFrom(self, elem):
         """Loads in all the field data from an XML node"""
         self.fields = []
         fields = self.fields
 
-        for field in elem.childNodes:
-            if field.nodeType != field.ELEMENT_NODE: continue
-            if field.nodeName in ['dependency', 'suggested']: continue  # Reggie Next compatibility
+        for field in elem:
+            if field.tag in ['dependency', 'suggested']: continue  # Reggie Next compatibility
 
-            attribs = field.attributes
-            if field.nodeName in ['dualbox', 'multidualbox']:  # Reggie Next compatibility
-                title = attribs['title2'].nodeValue
+            # lots of sprites share the same field titles, comments and
+            # list entries, so intern them to keep only one copy of each
+            attribs = field.attrib
+            if field.tag in ['dualbox', 'multidualbox']:  # Reggie Next compatibility
+                title = intern(attribs['title2'])
             else:
-                title = attribs['title'].nodeValue
+                title = intern(attribs['title'])
 
             commentParts = []
-            if keyInAttribs('comment', field):
-                commentParts.append(field.attributes['comment'].nodeValue)
-            if keyInAttribs('comment2', field):  # Reggie Next compatibility
-                commentParts.append(field.attributes['comment2'].nodeValue)
-            if keyInAttribs('advancedcomment', field):  # Reggie Next compatibility
-                commentParts.append(field.attributes['advancedcomment'].nodeValue)
+            if 'comment' in attribs:
+                commentParts.append(attribs['comment'])
+            if 'comment2' in attribs:  # Reggie Next compatibility
+                commentParts.append(attribs['comment2'])
+            if 'advancedcomment' in attribs:  # Reggie Next compatibility
+                commentParts.append(attribs['advancedcomment'])
             if commentParts:
-                comment = '<b>%s</b>:<br>%s' % (title, '<br/><br/>'.join(commentParts))
+                comment = intern(FieldCommentTemplate % (title, '<br/><br/>'.join(commentParts)))
             else:
                 comment = None
 
 
             maskHint = None
-            if keyInAttribs('nybble', field):
-                snybble = attribs['nybble'].nodeValue
-            elif keyInAttribs('bit', field):  # Reggie Next compatibility
-                bit = attribs['bit'].nodeValue
+            if 'nybble' in attribs:
+                snybble = attribs['nybble']
+            elif 'bit' in attribs:  # Reggie Next compatibility
+                bit = attribs['bit']
                 if ',' in bit:  # just take the least significant part -- close enough
                     bit = bit.split(',')[-1]
                 bit = bit.strip()
                 if bit.count('-') == 0:  # one bit -- we can infer a mask from this for checkboxes, too
                     bit = int(bit)
-                    snybble = str(((bit - 1) // 4) + 1)
-                    maskHint = 1 << (3 - ((bit - 1) % 4))
+                    snybble = str(((bit - 1) >> 2) + 1)
+                    maskHint = 1 << (3 - ((bit - 1) & 3))
                 elif bit.count('-') == 1:  # multiple bits; hopefully it aligns to a nybble
                     startbit, endbit = bit.split('-')
                     startbit, endbit = int(startbit), int(endbit)
-                    if endbit % 4 != 0:
+                    if endbit & 3 != 0:
                         # We're going to seriously lose precision here -- possibly
                         # catastrophically -- but maybe the code for the individual
                         # nodeName can use the maskHint to produce some reasonable behavior
-                        maskHint = 1 << (3 - ((endbit - 1) % 4))
-                    startnyb, endnyb = ((startbit - 1) // 4) + 1, ((endbit - 1) // 4) + 1
+                        maskHint = 1 << (3 - ((endbit - 1) & 3))
+                    startnyb, endnyb = ((startbit - 1) >> 2) + 1, ((endbit - 1) >> 2) + 1
                     if startnyb == endnyb:
                         snybble = str(startnyb)
                     else:
@@ -479,43 +653,29 @@ class SpriteDefinition():
                 else:
                     raise ValueError('Invalid "bit" field')
 
-            if keyInAttribs('mask', field):
-                mask = int(attribs['mask'].nodeValue)
+            if 'mask' in attribs:
+                mask = int(attribs['mask'])
             elif maskHint is not None:
                 mask = maskHint
             else:
                 mask = 1
 
-            if field.nodeName in ['checkbox', 'dualbox']:
+            if field.tag in ['checkbox', 'dualbox']:
                 # parameters: title, nybble, mask, comment
-                if '-' not in snybble:
-                    nybble = int(snybble) - 1
-                else:
-                    getit = snybble.split('-')
-                    nybble = (int(getit[0]) - 1, int(getit[1]))
+                nybble = ParseNybbles(snybble)[0]
 
                 fields.append((0, title, nybble, mask, comment))
 
-            elif field.nodeName == 'list':
+            elif field.tag == 'list':
                 # parameters: title, nybble, model, comment
-
-                if '-' not in snybble:
-                    nybble = int(snybble) - 1
-                    max = 16
-                else:
-                    getit = snybble.split('-')
-                    nybble = (int(getit[0]) - 1, int(getit[1]))
-                    max = (16 << ((nybble[1] - nybble[0] - 1) * 4))
+                nybble, max = ParseNybbles(snybble)
 
                 entries = []
-                existing = [None for i in range(max)]
-                for e in field.childNodes:
-                    if e.nodeType != e.ELEMENT_NODE: continue
-                    if e.nodeName != 'entry': continue
-
-                    i = int(e.attributes['value'].nodeValue)
-                    if e.childNodes:
-                        name = e.childNodes[0].nodeValue
+                existing = set()
+                for e in field.iterfind('entry'):
+                    i = int(e.get('value'))
+                    if e.text:
+                        name = intern(e.text)
                     else:  # Reggie Next compatibility
                         name = str(i)
 
@@ -529,29 +689,45 @@ class SpriteDefinition():
 
                     for v in valuesToAdd:
                         entries.append((v, name))
-                        existing[v] = True
+                        existing.add(v)
 
-                fields.append((1, title, nybble, SpriteDefinition.ListPropertyModel(entries, existing, max), comment))
+                fields.append((1, title, nybble, (entries, existing, max), comment))
 
-            elif field.nodeName in ['value', 'multidualbox']:
+            elif field.tag in ['value', 'multidualbox']:
                 # parameters: title, nybble, max, comment
 
                 # if it's 5-12 skip it
                 # fixes tobias's crashy "unknown values"
                 if snybble == '5-12': continue
 
-                if '-' not in snybble:
-                    nybble = int(snybble) - 1
-                    max = 16
-                else:
-                    getit = snybble.split('-')
-                    nybble = (int(getit[0]) - 1, int(getit[1]))
-                    max = (16 << ((nybble[1] - nybble[0] - 1) * 4))
+                nybble, max = ParseNybbles(snybble)
 
                 fields.append((2, title, nybble, max, comment))
 
             else:
-                raise ValueError(field.nodeName)
+                raise ValueError(field.tag)
+
+
+NybbleCache = {}
+def ParseNybbles(snybble):
+    """
+    Converts a sprite data nybble string (e.g. "3" or "5-8") into the
+    nybble index (or (start, end) tuple) and the number of possible
+    values. Only a few different strings are used, so results are cached
+    """
+    cached = NybbleCache.get(snybble)
+    if cached is not None: return cached
+
+    if '-' not in snybble:
+        nybble = int(snybble) - 1
+        max = 16
+    else:
+        getit = snybble.split('-')
+        nybble = (int(getit[0]) - 1, int(getit[1]))
+        max = (16 << ((nybble[1] - nybble[0] - 1) * 4))
+
+    NybbleCache[snybble] = nybble, max
+    return nybble, max
 
 
 def LoadSpriteData():
@@ -559,25 +735,34 @@ def LoadSpriteData():
     global Sprites
     if Sprites is not None: return
 
+    Sprites, errors, errortext = LoadCachedData('reggiedata/spritedata.xml', ParseSpriteData)
+
+    if len(errors) > 0:
+        QtWidgets.QMessageBox.warning(None, 'Warning',  "The sprite data file didn't load correctly. The following sprites have incorrect and/or broken data in them, and may not be editable correctly in the editor: " + (', '.join(errors)), QtWidgets.QMessageBox.StandardButton.Ok)
+        QtWidgets.QMessageBox.warning(None, 'Errors', repr(errortext))
+
+
+def ParseSpriteData(filename):
+    """
+    Parses the sprite data info from a file. Returns the sprite list,
+    and the IDs and error messages of any sprites that failed to load
+    """
     Sprites = [None] * 483
 
-    sd = minidom.parse('reggiedata/spritedata.xml')
-    root = sd.documentElement
+    root = etree.parse(filename).getroot()
     errors = []
     errortext = []
 
-    for sprite in root.childNodes:
-        if sprite.nodeType != sprite.ELEMENT_NODE: continue
-        if sprite.nodeName != 'sprite': continue
-
-        spriteid = int(sprite.attributes['id'].nodeValue)
-        spritename = unicode(sprite.attributes['name'].nodeValue)
+    for sprite in root.iterfind('sprite'):
+        attribs = sprite.attrib
+        spriteid = int(attribs['id'])
+        spritename = unicode(attribs['name'])
 
         notesParts = []
-        if keyInAttribs('notes', sprite):
-            notesParts.append(sprite.attributes['notes'].nodeValue)
-        if keyInAttribs('advancednotes', sprite):  # Reggie Next compatibility
-            notesParts.append(sprite.attributes['advancednotes'].nodeValue)
+        if 'notes' in attribs:
+            notesParts.append(attribs['notes'])
+        if 'advancednotes' in attribs:  # Reggie Next compatibility
+            notesParts.append(attribs['advancednotes'])
         if notesParts:
             notes = '<b>Sprite Notes:</b> ' + '<br/><br/>'.join(notesParts)
         else:
@@ -595,11 +780,7 @@ def LoadSpriteData():
 
         Sprites[spriteid] = sdef
 
-    sd.unlink()
-
-    if len(errors) > 0:
-        QtWidgets.QMessageBox.warning(None, 'Warning',  "The sprite data file didn't load correctly. The following sprites have incorrect and/or broken data in them, and may not be editable correctly in the editor: " + (', '.join(errors)), QtWidgets.QMessageBox.StandardButton.Ok)
-        QtWidgets.QMessageBox.warning(None, 'Errors', repr(errortext))
+    return Sprites, errors, errortext
 
 
 def LoadSpriteCategories():
@@ -607,34 +788,29 @@ def LoadSpriteCategories():
     global Sprites, SpriteCategories
     if SpriteCategories is not None: return
 
+    SpriteCategories = LoadCachedData('reggiedata/spritecategories.xml', ParseSpriteCategories)
+
+
+def ParseSpriteCategories(filename):
+    """Parses the sprite category info from a file"""
     SpriteCategories = []
 
-    sd = minidom.parse('reggiedata/spritecategories.xml')
-    root = sd.documentElement
+    root = etree.parse(filename).getroot()
 
     CurrentView = None
-    for view in root.childNodes:
-        if view.nodeType != view.ELEMENT_NODE: continue
-        if view.nodeName != 'view': continue
-
-        viewname = unicode(view.attributes['name'].nodeValue)
+    for view in root.iterfind('view'):
+        viewname = unicode(view.get('name'))
         CurrentView = []
         SpriteCategories.append((viewname, CurrentView, []))
 
         CurrentCategory = None
-        for category in view.childNodes:
-            if category.nodeType != category.ELEMENT_NODE: continue
-            if category.nodeName != 'category': continue
-
-            catname = unicode(category.attributes['name'].nodeValue)
+        for category in view.iterfind('category'):
+            catname = unicode(category.get('name'))
             CurrentCategory = []
             CurrentView.append((catname, CurrentCategory))
 
-            for attach in category.childNodes:
-                if attach.nodeType != attach.ELEMENT_NODE: continue
-                if attach.nodeName != 'attach': continue
-
-                sprite = attach.attributes['sprite'].nodeValue
+            for attach in category.iterfind('attach'):
+                sprite = attach.get('sprite')
                 if '-' not in sprite:
                     CurrentCategory.append(int(sprite))
                 else:
@@ -642,10 +818,11 @@ def LoadSpriteCategories():
                     for i in range(int(x[0]), int(x[1])+1):
                         CurrentCategory.append(i)
 
-    sd.unlink()
+    search = list(range(484))
+    search[483] = 9999 # "no results" special case
+    SpriteCategories.append(('Search', [('Search Results', search)], []))
 
-    SpriteCategories.append(('Search', [('Search Results', list(range(0,483)))], []))
-    SpriteCategories[-1][1][0][1].append(9999) # "no results" special case
+    return SpriteCategories
 
 
 EntranceTypeNames = None
@@ -654,8 +831,7 @@ def LoadEntranceNames():
     global EntranceTypeNames
     if EntranceTypeNames is not None: return
 
-    with open('reggiedata/entrancetypes.txt', 'r') as getit:
-        EntranceTypeNames = [x.strip() for x in getit.readlines()]
+    EntranceTypeNames = LoadCachedData('reggiedata/entrancetypes.txt', ParseNameList)
 
 
 MusicNames = None
@@ -664,9 +840,46 @@ def LoadMusicNames():
     global MusicNames
     if MusicNames is not None: return
 
-    with open('reggiedata/music.txt', 'r') as getit:
-        MusicNames = [x.strip() for x in getit.readlines()]
+    MusicNames = LoadCachedData('reggiedata/music.txt', ParseNameList)
+
+
+def ParseNameList(filename):
+    """Parses a file containing one name per line"""
+    with open(filename, 'r') as getit:
+        return [x.strip() for x in getit.readlines()]
+
+
+BundledDataFiles = [
+    ('reggiedata/levelnames.txt', ParseLevelNames),
+    ('reggiedata/tilesets.txt', ParseTilesetNames),
+    ('reggiedata/ts1_descriptions.txt', ParseObjDescriptions),
+    ('reggiedata/bga.txt', ParseBgNames),
+    ('reggiedata/bgb.txt', ParseBgNames),
+    ('reggiedata/spritedata.xml', ParseSpriteData),
+    ('reggiedata/spritecategories.xml', ParseSpriteCategories),
+    ('reggiedata/entrancetypes.txt', ParseNameList),
+    ('reggiedata/music.txt', ParseNameList),
+]
+
+
 
+class ReggieInfoUnpickler(pickle.Unpickler):
+    """
+    Unpickler for level info data that refuses to load any global other
+    than the one PyQt4 used to pickle QStrings, so opening a level can't
+    run arbitrary code
+    """
+    def find_class(self, module, name):
+        if (module, name) == ('sip', '_unpickle_type'):
+            return UnpickleQString
+        raise pickle.UnpicklingError('Unexpected global in level metadata: %s.%s' % (module, name))
+
+
+def UnpickleQString(module, name, args):
+    """Stand-in for sip._unpickle_type that turns QStrings into strings"""
+    if (module, name) != ('PyQt4.QtCore', 'QString'):
+        raise pickle.UnpicklingError('Unexpected type in level metadata: %s.%s' % (module, name))
+    return unicode(*args)
 
 
 def DecodeReggieInfo(data, validKeys):
@@ -675,6 +888,24 @@ def DecodeReggieInfo(data, validKeys):
     have only the keys specified. Raises an exception if the data can't
     be parsed.
     """
+    # Most level info can be loaded directly by the (C) unpickler
+    try:
+        levelinfo = ReggieInfoUnpickler(io.BytesIO(data)).load()
+    except Exception:
+        levelinfo = None
+
+    if (isinstance(levelinfo, dict) and set(levelinfo) == validKeys
+            and all(isinstance(v, (str, unicode)) for v in levelinfo.values())):
+        return levelinfo
+
+    return DecodeReggieInfoFromOpcodes(data, validKeys)
+
+
+def DecodeReggieInfoFromOpcodes(data, validKeys):
+    """
+    Fallback for DecodeReggieInfo() that picks the strings out of the
+    pickle opcodes, for level info that can't be unpickled normally
+    """
     # The idea here is that we implement just enough of the pickle
     # protocol (v2) to be able to parse the dictionaries that past
     # Reggies have pickled, even if PyQt4 isn't available.
@@ -741,18 +972,31 @@ class ChooseLevelNameDialog(QtWidgets.QDialog):
         tree.currentItemChanged.connect(self.HandleItemChange)
         tree.itemActivated.connect(self.HandleItemActivated)
 
+        # build all the items first and add them in one go, so the tree
+        # doesn't have to update after every single insertion
+        tree.setUpdatesEnabled(False)
+        tree.blockSignals(True)
+
+        wnodes = []
         for worldname, world in LevelNames:
             wnode = QtWidgets.QTreeWidgetItem()
             wnode.setText(0, worldname)
 
+            lnodes = []
             for levelname, level in world:
                 lnode = QtWidgets.QTreeWidgetItem()
                 lnode.setText(0, levelname)
                 lnode.setData(0, QtCore.Qt.ItemDataRole.UserRole, level)
                 lnode.setToolTip(0, level + '.arc')
-                wnode.addChild(lnode)
+                lnodes.append(lnode)
 
-            tree.addTopLevelItem(wnode)
+            wnode.addChildren(lnodes)
+            wnodes.append(wnode)
+
+        tree.addTopLevelItems(wnodes)
+
+        tree.blockSignals(False)
+        tree.setUpdatesEnabled(True)
 
         self.leveltree = tree
 
@@ -792,10 +1036,18 @@ class ChooseLevelNameDialog(QtWidgets.QDialog):
 
 
 Tiles = None # 256 tiles per tileset, plus 64 for each type of override
+# Each tile is an (atlas pixmap, x, y, width, height) tuple, so it can be
+# drawn straight out of its tileset with painter.drawPixmap(x, y, *tile)
 Overrides = None # 320 tiles, this is put into Tiles usually
 TileBehaviours = None
 ObjectDefinitions = None # 4 tilesets
 
+# What ObjectDef.load does with each possible command byte:
+# 0 = 3-byte tile, 1 = 1-byte slope/repeat marker, 2 = end of row, 3 = end of object
+ObjectIndexStruct = struct.Struct('>HBB')
+
+ObjectDefActions = tuple(3 if b == 0xFF else 2 if b == 0xFE else 1 if b & 0x80 else 0 for b in range(256))
+
 class ObjectDef():
     """Class for the object definitions"""
 
@@ -804,131 +1056,156 @@ class ObjectDef():
         self.width = 0
         self.height = 0
         self.rows = []
+        self.splitRows = None
+        self.splitRowsSlotsMod = None
+        self.slopeSections = None
+        self.slopeSectionsSlotsMod = None
 
     def load(self, source, offset, tileoffset):
-        """Load an object definition"""
+        """
+        Load an object definition. source should be a bytearray (or
+        anything else that gives ints when indexed)
+        """
         i = offset
         row = []
+        addTile = row.append
+        addRow = self.rows.append
+        actions = ObjectDefActions
 
         while True:
-            cbyte = ord(source[i])
+            cbyte = source[i]
+            action = actions[cbyte]
 
-            if cbyte == 0xFE:
-                self.rows.append(row)
+            if action == 0:
+                extra = source[i+2]
+                addTile((cbyte, source[i+1] | ((extra & 3) << 8), extra >> 2))
+                i += 3
+            elif action == 1:
+                addTile((cbyte,))
+                i += 1
+            elif action == 2:
+                addRow(row)
                 i += 1
                 row = []
-            elif cbyte == 0xFF:
+                addTile = row.append
+            else:
                 return
-            elif (cbyte & 0x80) != 0:
-                row.append((cbyte,))
-                i += 1
+
+    def split(self, tileset=None):
+        """
+        Split the rows into before/in/after-repeat groups, and each row's
+        tile IDs likewise. This is cached on first use (after overrides
+        have been applied) so rendering doesn't have to do it every time.
+        If a tileset slot is given, the tile IDs are moved into it for
+        the tileset-slots mod, and cached separately
+        """
+        before = []
+        inRepeat = []
+        after = []
+
+        for row in self.rows:
+            if len(row) == 0: continue
+            if (row[0][0] & 2) != 0:
+                inRepeat.append(SplitStandardRow(row, tileset))
+            elif inRepeat:
+                after.append(SplitStandardRow(row, tileset))
             else:
-                extra = ord(source[i+2])
-                tile = (cbyte, ord(source[i+1]) | ((extra & 3) << 8), extra >> 2)
-                row.append(tile)
-                i += 3
+                before.append(SplitStandardRow(row, tileset))
 
+        splits = (before, inRepeat, after)
+        if tileset is None:
+            self.splitRows = splits
+        else:
+            self.splitRowsSlotsMod = splits
+        return splits
+
+
+def SplitStandardRow(row, tileset=None):
+    """Split a row from an object into before/in/after-repeat tile IDs"""
+    before = []
+    inRepeat = []
+    after = []
+    addBefore, addIn, addAfter = before.append, inRepeat.append, after.append
+
+    for tile in row:
+        if (tile[0] & 1) != 0:
+            addIn(tile[1])
+        elif inRepeat:
+            addAfter(tile[1])
+        else:
+            addBefore(tile[1])
+
+    if tileset is not None:
+        return SlotsModTiles(before, tileset), SlotsModTiles(inRepeat, tileset), SlotsModTiles(after, tileset)
+    return before, inRepeat, after
 
-def RenderObject(tileset, objnum, width, height, fullslope=False):
-    """Render a tileset object into an array"""
-    # allocate an array
-    errorDest = []
-    for i in range(height): errorDest.append([None]*width)
-    dest = []
-    for i in range(height): dest.append([0]*width)
 
+def SlotsModTiles(tiles, tileset):
+    """Move tile IDs into the given tileset slot, for the tileset-slots mod"""
+    base = tileset << 8
+    return [base | (tile & 0xFF) if 0 < tile < 1024 else tile for tile in tiles]
+
+
+def RenderObject(tileset, objnum, width, height, fullslope=False):
+    """
+    Render a tileset object into an array. Identical rows may be shared
+    between several positions, so the result must not be modified
+    """
     # ignore non-existent objects
     tileset_defs = ObjectDefinitions[tileset]
-    if tileset_defs is None: return errorDest
-    obj = tileset_defs[objnum]
-    if obj is None: return errorDest
-    if len(obj.rows) == 0: return errorDest
+    obj = None if tileset_defs is None else tileset_defs[objnum]
+    if obj is None or len(obj.rows) == 0:
+        return [[None] * width] * height
 
     # diagonal objects are rendered differently
     if (obj.rows[0][0][0] & 0x80) != 0:
-        RenderDiagonalObject(dest, obj, width, height, fullslope)
+        # start with all empty tiles
+        dest = [[-1] * width for y in range(height)]
+        RenderDiagonalObject(dest, obj, width, height, fullslope, tileset if TilesetSlotsModEnabled else None)
     else:
         # standard object
-        repeatFound = False
-        beforeRepeat = []
-        inRepeat = []
-        afterRepeat = []
-
-        for row in obj.rows:
-            if len(row) == 0: continue
-            if (row[0][0] & 2) != 0:
-                repeatFound = True
-                inRepeat.append(row)
-            else:
-                if repeatFound:
-                    afterRepeat.append(row)
-                else:
-                    beforeRepeat.append(row)
-
-        bc = len(beforeRepeat); ic = len(inRepeat); ac = len(afterRepeat)
-        if ic == 0:
-            for y in range(height):
-                RenderStandardRow(dest[y], beforeRepeat[y % bc], y, width)
+        if TilesetSlotsModEnabled:
+            splits = obj.splitRowsSlotsMod
+            if splits is None:
+                splits = obj.split(tileset)
         else:
-            afterthreshold = height - ac - 1
-            for y in range(height):
-                if y < bc:
-                    RenderStandardRow(dest[y], beforeRepeat[y], y, width)
-                elif y > afterthreshold:
-                    RenderStandardRow(dest[y], afterRepeat[y - height + ac], y, width)
-                else:
-                    RenderStandardRow(dest[y], inRepeat[(y - bc) % ic], y, width)
+            splits = obj.splitRows
+            if splits is None:
+                splits = obj.split()
 
-    if TilesetSlotsModEnabled:
-        for row in dest:
-            for i, tile in enumerate(row):
-                if 0 < tile < 1024:
-                    row[i] = (tileset * 256) + (tile % 256)
+        # render each distinct row once, then lay them out vertically
+        # (repeated rows are the same list, which saves a lot of memory
+        # for tall objects)
+        before, inRepeat, after = [[RepeatPattern(b, i, a, width) for b, i, a in part] for part in splits]
+        dest = RepeatPattern(before, inRepeat, after, height)
 
     return dest
 
 
-def RenderStandardRow(dest, row, y, width):
-    """Render a row from an object"""
-    repeatFound = False
-    beforeRepeat = []
-    inRepeat = []
-    afterRepeat = []
-
-    for tile in row:
-        if (tile[0] & 1) != 0:
-            repeatFound = True
-            inRepeat.append(tile)
-        else:
-            if repeatFound:
-                afterRepeat.append(tile)
-            else:
-                beforeRepeat.append(tile)
-
-    bc = len(beforeRepeat); ic = len(inRepeat); ac = len(afterRepeat)
+def RepeatPattern(before, inRepeat, after, length):
+    """
+    Lays out the items from an object row (or the rows from an object)
+    across the given length: the "before" items, then the "in" items
+    repeated to fill the space, then the "after" items. If nothing
+    repeats, the "before" items are repeated instead. This is all done
+    with list slicing and multiplication to avoid per-item Python code.
+    """
+    bc = len(before); ic = len(inRepeat); ac = len(after)
     if ic == 0:
-        for x in range(width):
-            dest[x] = beforeRepeat[x % bc][1]
-    else:
-        afterthreshold = width - ac - 1
-        for x in range(width):
-            if x < bc:
-                dest[x] = beforeRepeat[x][1]
-            elif x > afterthreshold:
-                dest[x] = afterRepeat[x - width + ac][1]
-            else:
-                dest[x] = inRepeat[(x - bc) % ic][1]
+        return (before * (length // bc + 1))[:length]
 
+    result = before[:length]
+    middle = length - bc - ac
+    if middle > 0:
+        result += (inRepeat * (middle // ic + 1))[:middle]
+    result += after[max(bc, length - ac) - length + ac:]
+    return result
 
-def RenderDiagonalObject(dest, obj, width, height, fullslope):
-    """Render a diagonal object"""
-    # set all to empty tiles
-    for row in dest:
-        for x in range(width):
-            row[x] = -1
 
+def RenderDiagonalObject(dest, obj, width, height, fullslope, tileset=None):
+    """Render a diagonal object into an array of empty (-1) tiles"""
     # get sections
-    mainBlock,subBlock = GetSlopeSections(obj)
+    mainBlock,subBlock = GetSlopeSections(obj, tileset)
     cbyte = obj.rows[0][0][0]
 
     # get direction
@@ -978,85 +1255,89 @@ def RenderDiagonalObject(dest, obj, width, height, fullslope):
         yi = -len(mainBlock)
 
 
-    # finally draw it
+    # work out where the sub block goes relative to the main block, and
+    # the rows and columns covered by each step of the staircase
+    mainHeight = len(mainBlock)
+    top, bottom = 0, mainHeight
+    left = 0
+    if subBlock is not None:
+        subx = len(mainBlock[0]) - len(subBlock[0]) if goLeft else 0
+        suby = -len(subBlock) if goDown else mainHeight
+        top = min(top, suby)
+        bottom = max(bottom, suby + len(subBlock))
+        left = min(left, subx)
+
+    # finally draw it, stopping once the staircase leaves the object
+    # (fullslope objects often have many more steps than will fit)
     for i in range(drawAmount):
+        if x + left >= width: break
+        if yi > 0 and y + top >= height: break
+        if yi < 0 and y + bottom <= 0: break
+
         PutObjectArray(dest, x, y, mainBlock, width, height)
         if subBlock is not None:
-            xb = x
-            if goLeft: xb = x + len(mainBlock[0]) - len(subBlock[0])
-            if goDown:
-                PutObjectArray(dest, xb, y - len(subBlock), subBlock, width, height)
-            else:
-                PutObjectArray(dest, xb, y + len(mainBlock), subBlock, width, height)
+            PutObjectArray(dest, x + subx, y + suby, subBlock, width, height)
         x += xi
         y += yi
 
 
 def PutObjectArray(dest, xo, yo, block, width, height):
     """Places a tile array into an object"""
-    #for y in range(yo,min(yo+len(block),height)):
-    for y in range(yo,yo+len(block)):
-        if y < 0: continue
-        if y >= height: continue
-        drow = dest[y]
-        srow = block[y-yo]
-        #for x in range(xo,min(xo+len(srow),width)):
-        for x in range(xo,xo+len(srow)):
-            if x < 0: continue
-            if x >= width: continue
-            drow[x] = srow[x-xo][1]
-
-
-def GetSlopeSections(obj):
-    """Sorts the slope data into sections"""
+    # clip the block against the object once, then copy whole row slices
+    x1 = max(xo, 0)
+    for y in range(max(yo, 0), min(yo + len(block), height)):
+        srow = block[y - yo]
+        x2 = min(xo + len(srow), width)
+        if x1 < x2:
+            dest[y][x1:x2] = srow[x1 - xo:x2 - xo]
+
+
+def GetSlopeSections(obj, tileset=None):
+    """
+    Sorts the slope data into sections. These are cached on the object
+    definition, like its row splits
+    """
+    cached = obj.slopeSections if tileset is None else obj.slopeSectionsSlotsMod
+    if cached is not None: return cached
+
     sections = []
     currentSection = None
 
     for row in obj.rows:
         if len(row) > 0 and (row[0][0] & 0x80) != 0: # begin new section
             if currentSection is not None:
-                sections.append(CreateSection(currentSection))
+                sections.append(CreateSection(currentSection, tileset))
             currentSection = []
         currentSection.append(row)
 
     if currentSection is not None: # end last section
-        sections.append(CreateSection(currentSection))
+        sections.append(CreateSection(currentSection, tileset))
 
     if len(sections) == 1:
-        return (sections[0],None)
+        result = (sections[0],None)
     else:
-        return (sections[0],sections[1])
-
+        result = (sections[0],sections[1])
 
-def CreateSection(rows):
-    """Create a slope section"""
-    # calculate width
-    width = 0
-    for row in rows:
-        thiswidth = CountTiles(row)
-        if width < thiswidth: width = thiswidth
+    if tileset is None:
+        obj.slopeSections = result
+    else:
+        obj.slopeSectionsSlotsMod = result
+    return result
 
-    # create the section
-    section = []
-    for row in rows:
-        drow = [0] * width
-        x = 0
-        for tile in row:
-            if (tile[0] & 0x80) == 0:
-                drow[x] = tile
-                x += 1
-        section.append(drow)
 
-    return section
+def CreateSection(rows, tileset=None):
+    """Create a slope section (a rectangular array of tile IDs)"""
+    # extract the real tiles from each row
+    section = [[tile[1] for tile in row if (tile[0] & 0x80) == 0] for row in rows]
+    if tileset is not None:
+        section = [SlotsModTiles(row, tileset) for row in section]
 
+    # pad them all to the same width
+    width = max(len(row) for row in section)
+    for row in section:
+        row.extend([0] * (width - len(row)))
 
-def CountTiles(row):
-    """Counts the amount of real tiles in an object row"""
-    res = 0
-    for tile in row:
-        if (tile[0] & 0x80) == 0:
-            res += 1
-    return res
+    return section
 
 
 def CreateTilesets():
@@ -1114,18 +1395,11 @@ def _LoadTileset(idx, name):
         lz = lz77.LZS11()
         img = LoadTextureUsingOldMethod(lz.Decompress11LZS(comptiledata))
 
-    # crop the tiles out
+    # point each tile at its spot in the texture (no need to copy them out)
     dest = QtGui.QPixmap.fromImage(img)
 
-    sourcex = 4
-    sourcey = 4
     tileoffset = idx*256
-    for i in range(tileoffset,tileoffset+256):
-        Tiles[i] = dest.copy(sourcex,sourcey,24,24)
-        sourcex += 32
-        if sourcex >= 1024:
-            sourcex = 4
-            sourcey += 32
+    Tiles[tileoffset:tileoffset+256] = [(dest, sourcex, sourcey, 24, 24) for sourcey in range(4, 256, 32) for sourcex in range(4, 1024, 32)]
 
     # tile behaviours aren't needed yet?
 
@@ -1133,12 +1407,11 @@ def _LoadTileset(idx, name):
     defs = [None]*256
 
     indexfile = arc['BG_unt/%s_hd.bin' % name]
-    deffile = arc['BG_unt/%s.bin' % name]
+    deffile = bytearray(arc['BG_unt/%s.bin' % name])
     objcount = len(indexfile) // 4
-    indexstruct = struct.Struct('>HBB')
 
     for i in range(objcount):
-        data = indexstruct.unpack_from(indexfile, i << 2)
+        data = ObjectIndexStruct.unpack_from(indexfile, i << 2)
         obj = ObjectDef()
         obj.width = data[1]
         obj.height = data[2]
@@ -1150,85 +1423,89 @@ def _LoadTileset(idx, name):
     ProcessOverrides(idx, name)
 
 
-RGB4A3LUT = []
-RGB4A3LUT_NoAlpha = []
+RGB4A3LUT = None
+RGB4A3LUT_NoAlpha = None
 def PrepareRGB4A3LUTs():
+    """Ensures that the RGB4A3 color lookup tables are loaded"""
     global RGB4A3LUT, RGB4A3LUT_NoAlpha
+    if RGB4A3LUT is not None: return
 
-    RGB4A3LUT = [None] * 0x10000
-    RGB4A3LUT_NoAlpha = [None] * 0x10000
-    for LUT, hasA in [(RGB4A3LUT, True), (RGB4A3LUT_NoAlpha, False)]:
+    RGB4A3LUT, RGB4A3LUT_NoAlpha = LoadGeneratedTable('rgb4a3luts', BuildRGB4A3LUTs)
 
-        # RGB4A3
-        for d in range(0x8000):
-            if hasA:
-                alpha = d >> 12
-                alpha = alpha << 5 | alpha << 2 | alpha >> 1
-            else:
-                alpha = 0xFF
-            red = ((d >> 8) & 0xF) * 17
-            green = ((d >> 4) & 0xF) * 17
-            blue = (d & 0xF) * 17
-            LUT[d] = blue | (green << 8) | (red << 16) | (alpha << 24)
 
-        # RGB555
-        for d in range(0x8000):
-            red = d >> 10
-            red = red << 3 | red >> 2
-            green = (d >> 5) & 0x1F
-            green = green << 3 | green >> 2
-            blue = d & 0x1F
-            blue = blue << 3 | blue >> 2
-            LUT[d + 0x8000] = blue | (green << 8) | (red << 16) | 0xFF000000
+def BuildRGB4A3LUTs():
+    """Builds the RGB4A3 color lookup tables (with and without alpha)"""
+    # color channels expanded to 8 bits
+    c4 = [c * 17 for c in range(16)]
+    c5 = [c << 3 | c >> 2 for c in range(32)]
+    a3 = [a << 5 | a << 2 | a >> 1 for a in range(8)]
 
-PrepareRGB4A3LUTs()
+    # RGB4A3 (without the alpha yet)
+    rgb4 = [c4[d & 0xF] | (c4[(d >> 4) & 0xF] << 8) | (c4[(d >> 8) & 0xF] << 16) for d in range(0x8000)]
 
+    # RGB555, which is always opaque
+    rgb555 = [c5[d & 0x1F] | (c5[(d >> 5) & 0x1F] << 8) | (c5[d >> 10] << 16) | 0xFF000000 for d in range(0x8000)]
 
-def LoadTextureUsingOldMethod(tiledata):
-    tx = 0; ty = 0
-    iter = tiledata.__iter__()
-    dest = [0] * 262144
+    # packed arrays take a fraction of the memory of lists of ints
+    withAlpha = array.array('I', [c | (a3[d >> 12] << 24) for d, c in enumerate(rgb4)] + rgb555)
+    noAlpha = array.array('I', [c | 0xFF000000 for c in rgb4] + rgb555)
+    return withAlpha, noAlpha
 
-    LUT = RGB4A3LUT if EnableAlpha else RGB4A3LUT_NoAlpha
 
-    # Loop over all texels (of which there are 16384)
+TextureDeswizzleIndex = None
+def PrepareTextureDeswizzleIndex():
+    """Ensures that the texture deswizzle index is loaded"""
+    global TextureDeswizzleIndex
+    if TextureDeswizzleIndex is not None: return
+
+    # (kept as a compact array -- as a list it would be about 9 MB of
+    # int objects for the whole session)
+    TextureDeswizzleIndex = LoadGeneratedTable('texturedeswizzle', BuildTextureDeswizzleIndex)
+
+
+def BuildTextureDeswizzleIndex():
+    """
+    Work out which 16-bit pixel of the tiled source data each pixel of
+    a 1024x256 tileset texture comes from. Pixels in the border around
+    each tile (which isn't rendered) get the index just past the end of
+    the source data, where a transparent pixel is placed
+    """
+    index = [262144] * 262144
+
+    # Loop over all texels (of which there are 16384), skipping every
+    # row and column of texels that is a multiple of 8 or (a multiple
+    # of 8) - 1
     for i in range(16384):
-        temp1 = (i // 256) % 8
-        if temp1 == 0 or temp1 == 7:
-            # Skip every row of texels that is a multiple of 8 or (a
-            # multiple of 8) - 1
-            # Unrolled loop for performance.
-            next(iter); next(iter); next(iter); next(iter)
-            next(iter); next(iter); next(iter); next(iter)
-            next(iter); next(iter); next(iter); next(iter)
-            next(iter); next(iter); next(iter); next(iter)
-            next(iter); next(iter); next(iter); next(iter)
-            next(iter); next(iter); next(iter); next(iter)
-            next(iter); next(iter); next(iter); next(iter)
-            next(iter); next(iter); next(iter); next(iter)
-        else:
-            temp2 = i % 8
-            if temp2 == 0 or temp2 == 7:
-                # Skip every column of texels that is a multiple of 8
-                # or (a multiple of 8) - 1
-                # Unrolled loop for performance.
-                next(iter); next(iter); next(iter); next(iter)
-                next(iter); next(iter); next(iter); next(iter)
-                next(iter); next(iter); next(iter); next(iter)
-                next(iter); next(iter); next(iter); next(iter)
-                next(iter); next(iter); next(iter); next(iter)
-                next(iter); next(iter); next(iter); next(iter)
-                next(iter); next(iter); next(iter); next(iter)
-                next(iter); next(iter); next(iter); next(iter)
-            else:
-                # Actually render this texel
-                for y in range(ty, ty+4):
-                    for x in range(tx, tx+4):
-                        dest[x + y * 1024] = LUT[next(iter) << 8 | next(iter)]
+        if (i >> 8) & 7 in (0, 7) or i & 7 in (0, 7): continue
+
+        src = i << 4
+        dst = ((i & 255) << 2) | ((i >> 8) << 12)
+        for y in range(4):
+            index[dst:dst+4] = range(src, src+4)
+            src += 4
+            dst += 1024
+
+    return array.array('i', index)
+
+
+# Fixed tables that are cached by LoadGeneratedTable (and pre-built into
+# the data bundle for release builds)
+GeneratedTables = [
+    ('rgb4a3luts', BuildRGB4A3LUTs),
+    ('texturedeswizzle', BuildTextureDeswizzleIndex),
+]
+
+
+def LoadTextureUsingOldMethod(tiledata):
+    PrepareRGB4A3LUTs()
+    PrepareTextureDeswizzleIndex()
+    LUT = RGB4A3LUT if EnableAlpha else RGB4A3LUT_NoAlpha
 
-        # Move on to the next texel
-        tx += 4
-        if tx >= 1024: tx = 0; ty += 4
+    # Convert every source pixel to ARGB, then rearrange them into
+    # place. Both steps are single C-level map() passes.
+    colors = list(map(LUT.__getitem__, struct.unpack_from('>262144H', tiledata)))
+    colors.append(0)
+    dest = map(colors.__getitem__, TextureDeswizzleIndex)
 
     # Convert the list of ARGB color values into a bytes object, and
     # then convert that into a QImage
@@ -1237,14 +1514,14 @@ def LoadTextureUsingOldMethod(tiledata):
 
 def UnloadTileset(idx):
     """Unload the tileset from a specific slot"""
-    for i in range(idx*256, idx*256+256):
-        Tiles[i] = None
+    Tiles[idx*256:idx*256+256] = [None] * 256
 
     ObjectDefinitions[idx] = None
 
 
 def ProcessOverrides(idx, name):
     """Load overridden tiles if there are any"""
+    # Runs of consecutive tiles are copied with slice assignments
 
     try:
         tsindexes = ['Pa0_jyotyu', 'Pa0_jyotyu_chika', 'Pa0_jyotyu_setsugen', 'Pa0_jyotyu_yougan', 'Pa0_jyotyu_staffRoll']
@@ -1259,10 +1536,8 @@ def ProcessOverrides(idx, name):
 
             # Invisible blocks
             # these are all the same so let's just load them from the first row
-            replace = 1024
-            for i in [3,4,5,6,7,8,9,10,13]:
-                t[i] = t[replace]
-                replace += 1
+            t[3:11] = t[1024:1032]
+            t[13] = t[1032]
 
             # Question and brick blocks
             # these don't have their own tiles so we have to do them by objects
@@ -1282,34 +1557,14 @@ def ProcessOverrides(idx, name):
 
             t[16] = t[1291] # 1x1 slope going up
             t[17] = t[1292] # 1x1 slope going down
-            t[18] = t[1281] # 2x1 slope going up (part 1)
-            t[19] = t[1282] # 2x1 slope going up (part 2)
-            t[20] = t[1283] # 2x1 slope going down (part 1)
-            t[21] = t[1284] # 2x1 slope going down (part 2)
-            t[22] = t[1301] # 4x1 slope going up (part 1)
-            t[23] = t[1302] # 4x1 slope going up (part 2)
-            t[24] = t[1303] # 4x1 slope going up (part 3)
-            t[25] = t[1304] # 4x1 slope going up (part 4)
-            t[26] = t[1305] # 4x1 slope going down (part 1)
-            t[27] = t[1306] # 4x1 slope going down (part 2)
-            t[28] = t[1307] # 4x1 slope going down (part 3)
-            t[29] = t[1308] # 4x1 slope going down (part 4)
+            t[18:22] = t[1281:1285] # 2x1 slopes going up, then down (2 parts each)
+            t[22:30] = t[1301:1309] # 4x1 slopes going up, then down (4 parts each)
             t[30] = t[1062] # coin
 
             t[32] = t[1289] # 1x1 roof going down
             t[33] = t[1290] # 1x1 roof going up
-            t[34] = t[1285] # 2x1 roof going down (part 1)
-            t[35] = t[1286] # 2x1 roof going down (part 2)
-            t[36] = t[1287] # 2x1 roof going up (part 1)
-            t[37] = t[1288] # 2x1 roof going up (part 2)
-            t[38] = t[1293] # 4x1 roof going down (part 1)
-            t[39] = t[1294] # 4x1 roof going down (part 2)
-            t[40] = t[1295] # 4x1 roof going down (part 3)
-            t[41] = t[1296] # 4x1 roof going down (part 4)
-            t[42] = t[1297] # 4x1 roof going up (part 1)
-            t[43] = t[1298] # 4x1 roof going up (part 2)
-            t[44] = t[1299] # 4x1 roof going up (part 3)
-            t[45] = t[1300] # 4x1 roof going up (part 4)
+            t[34:38] = t[1285:1289] # 2x1 roofs going down, then up (2 parts each)
+            t[38:46] = t[1293:1301] # 4x1 roofs going down, then up (4 parts each)
             t[46] = t[1312] # P-switch coins
 
             t[53] = t[1314] # donut lift
@@ -1319,29 +1574,15 @@ def ProcessOverrides(idx, name):
         elif name == 'Pa1_nohara' or name == 'Pa1_nohara2' or name == 'Pa1_daishizen':
             # flowers
             t = Tiles
-            t[416] = t[1092] # grass
-            t[417] = t[1093]
-            t[418] = t[1094]
-            t[419] = t[1095]
-            t[420] = t[1096]
+            t[416:421] = t[1092:1097] # grass
 
             if name == 'Pa1_nohara' or name == 'Pa1_nohara2':
-                t[432] = t[1068] # flowers
-                t[433] = t[1069] # flowers
-                t[434] = t[1070] # flowers
-
-                t[448] = t[1158] # flowers on grass
-                t[449] = t[1159]
-                t[450] = t[1160]
+                t[432:435] = t[1068:1071] # flowers
+                t[448:451] = t[1158:1161] # flowers on grass
             elif name == 'Pa1_daishizen':
                 # forest flowers
-                t[432] = t[1071] # flowers
-                t[433] = t[1072] # flowers
-                t[434] = t[1073] # flowers
-
-                t[448] = t[1222] # flowers on grass
-                t[449] = t[1223]
-                t[450] = t[1224]
+                t[432:435] = t[1071:1074] # flowers
+                t[448:451] = t[1222:1225] # flowers on grass
 
         elif name == 'Pa3_rail' or name == 'Pa3_rail_white' or name == 'Pa3_daishizen':
             # These are the line guides
@@ -1349,24 +1590,16 @@ def ProcessOverrides(idx, name):
 
             t = Tiles
 
-            t[768] = t[1088] # horizontal line
-            t[769] = t[1089] # vertical line
-            t[770] = t[1090] # bottomright corner
-            t[771] = t[1091] # topleft corner
-
-            t[784] = t[1152] # left red blob (part 1)
-            t[785] = t[1153] # top red blob (part 1)
-            t[786] = t[1154] # top red blob (part 2)
-            t[787] = t[1155] # right red blob (part 1)
-            t[788] = t[1156] # topleft red blob
-            t[789] = t[1157] # topright red blob
-
-            t[800] = t[1216] # left red blob (part 2)
-            t[801] = t[1217] # bottom red blob (part 1)
-            t[802] = t[1218] # bottom red blob (part 2)
-            t[803] = t[1219] # right red blob (part 2)
-            t[804] = t[1220] # bottomleft red blob
-            t[805] = t[1221] # bottomright red blob
+            # horizontal line, vertical line, bottomright corner, topleft corner
+            t[768:772] = t[1088:1092]
+
+            # left red blob (part 1), top red blob (parts 1 and 2),
+            # right red blob (part 1), topleft red blob, topright red blob
+            t[784:790] = t[1152:1158]
+
+            # left red blob (part 2), bottom red blob (parts 1 and 2),
+            # right red blob (part 2), bottomleft red blob, bottomright red blob
+            t[800:806] = t[1216:1222]
 
             # Those are all for Pa3_daishizen
             if name == 'Pa3_daishizen': return
@@ -1378,49 +1611,16 @@ def ProcessOverrides(idx, name):
             t[833] = t[1121] # 1x2 diagonal going down (part 1)
             t[834] = t[1186] # 1x1 diagonal going up
             t[835] = t[1187] # 1x1 diagonal going down
-            t[836] = t[1058] # 2x1 diagonal going up (part 1)
-            t[837] = t[1059] # 2x1 diagonal going up (part 2)
-            t[838] = t[1060] # 2x1 diagonal going down (part 1)
-            t[839] = t[1061] # 2x1 diagonal going down (part 2)
+            t[836:840] = t[1058:1062] # 2x1 diagonals going up, then down (2 parts each)
 
             t[848] = t[1184] # 1x2 diagonal going up (part 2)
             t[849] = t[1185] # 1x2 diagonal going down (part 2)
             t[850] = t[1250] # 1x1 diagonal going up
             t[851] = t[1251] # 1x1 diagonal going down
-            t[852] = t[1122] # 2x1 diagonal going up (part 1)
-            t[853] = t[1123] # 2x1 diagonal going up (part 2)
-            t[854] = t[1124] # 2x1 diagonal going down (part 1)
-            t[855] = t[1125] # 2x1 diagonal going down (part 2)
-
-            t[866] = t[1065] # big circle piece 1st row
-            t[867] = t[1066] # big circle piece 1st row
-            t[870] = t[1189] # medium circle piece 1st row
-            t[871] = t[1190] # medium circle piece 1st row
-
-            t[881] = t[1128] # big circle piece 2nd row
-            t[882] = t[1129] # big circle piece 2nd row
-            t[883] = t[1130] # big circle piece 2nd row
-            t[884] = t[1131] # big circle piece 2nd row
-            t[885] = t[1252] # medium circle piece 2nd row
-            t[886] = t[1253] # medium circle piece 2nd row
-            t[887] = t[1254] # medium circle piece 2nd row
-            t[888] = t[1188] # small circle
+            t[852:856] = t[1122:1126] # 2x1 diagonals going up, then down (2 parts each)
 
-            t[896] = t[1191] # big circle piece 3rd row
-            t[897] = t[1192] # big circle piece 3rd row
-            t[900] = t[1195] # big circle piece 3rd row
-            t[901] = t[1316] # medium circle piece 3rd row
-            t[902] = t[1317] # medium circle piece 3rd row
-            t[903] = t[1318] # medium circle piece 3rd row
-
-            t[912] = t[1255] # big circle piece 4th row
-            t[913] = t[1256] # big circle piece 4th row
-            t[916] = t[1259] # big circle piece 4th row
-
-            t[929] = t[1320] # big circle piece 5th row
-            t[930] = t[1321] # big circle piece 5th row
-            t[931] = t[1322] # big circle piece 5th row
-            t[932] = t[1323] # big circle piece 5th row
+            ProcessCircleOverrides(t)
+            t[888] = t[1188] # small circle
 
         elif name == 'Pa3_MG_house_ami_rail':
             t = Tiles
@@ -1433,71 +1633,56 @@ def ProcessOverrides(idx, name):
             t[849] = t[1089] # vertical line
             t[850] = t[1091] # topleft corner
 
-            t[835] = t[1152] # left red blob (part 1)
-            t[836] = t[1153] # top red blob (part 1)
-            t[837] = t[1154] # top red blob (part 2)
-            t[838] = t[1155] # right red blob (part 1)
-
-            t[851] = t[1216] # left red blob (part 2)
-            t[852] = t[1217] # bottom red blob (part 1)
-            t[853] = t[1218] # bottom red blob (part 2)
-            t[854] = t[1219] # right red blob (part 2)
-
-            t[866] = t[1065] # big circle piece 1st row
-            t[867] = t[1066] # big circle piece 1st row
-            t[870] = t[1189] # medium circle piece 1st row
-            t[871] = t[1190] # medium circle piece 1st row
-
-            t[881] = t[1128] # big circle piece 2nd row
-            t[882] = t[1129] # big circle piece 2nd row
-            t[883] = t[1130] # big circle piece 2nd row
-            t[884] = t[1131] # big circle piece 2nd row
-            t[885] = t[1252] # medium circle piece 2nd row
-            t[886] = t[1253] # medium circle piece 2nd row
-            t[887] = t[1254] # medium circle piece 2nd row
-
-            t[896] = t[1191] # big circle piece 3rd row
-            t[897] = t[1192] # big circle piece 3rd row
-            t[900] = t[1195] # big circle piece 3rd row
-            t[901] = t[1316] # medium circle piece 3rd row
-            t[902] = t[1317] # medium circle piece 3rd row
-            t[903] = t[1318] # medium circle piece 3rd row
-
-            t[912] = t[1255] # big circle piece 4th row
-            t[913] = t[1256] # big circle piece 4th row
-            t[916] = t[1259] # big circle piece 4th row
-
-            t[929] = t[1320] # big circle piece 5th row
-            t[930] = t[1321] # big circle piece 5th row
-            t[931] = t[1322] # big circle piece 5th row
-            t[932] = t[1323] # big circle piece 5th row
+            # left red blob (part 1), top red blob (parts 1 and 2), right red blob (part 1)
+            t[835:839] = t[1152:1156]
+
+            # left red blob (part 2), bottom red blob (parts 1 and 2), right red blob (part 2)
+            t[851:855] = t[1216:1220]
+
+            ProcessCircleOverrides(t)
     except:
         # Fail silently
         pass
 
 
+def ProcessCircleOverrides(t):
+    """Override the big and medium line-guide circle pieces"""
+    t[866:868] = t[1065:1067] # big circle piece 1st row
+    t[870:872] = t[1189:1191] # medium circle piece 1st row
+
+    t[881:885] = t[1128:1132] # big circle piece 2nd row
+    t[885:888] = t[1252:1255] # medium circle piece 2nd row
+
+    t[896:898] = t[1191:1193] # big circle piece 3rd row
+    t[900] = t[1195] # big circle piece 3rd row
+    t[901:904] = t[1316:1319] # medium circle piece 3rd row
+
+    t[912:914] = t[1255:1257] # big circle piece 4th row
+    t[916] = t[1259] # big circle piece 4th row
+
+    t[929:933] = t[1320:1324] # big circle piece 5th row
+
+
 def LoadOverrides():
     """Load overrides"""
     global Overrides
     Overrides = [None]*320
 
     OverrideBitmap = QtGui.QPixmap('reggiedata/overrides.png')
-    idx = 0
     xcount = OverrideBitmap.width() // 24
     ycount = OverrideBitmap.height() // 24
-    sourcex = 0
-    sourcey = 0
 
+    # each row of the image is a block of 64 overrides; like tileset
+    # tiles, these just point into the image instead of copying out of it
     for y in range(ycount):
         for x in range(xcount):
-            Overrides[idx] = OverrideBitmap.copy(sourcex, sourcey, 24, 24)
-            idx += 1
-            sourcex += 24
-        sourcex = 0
-        sourcey += 24
-        if idx % 64 != 0:
-            idx -= (idx % 64)
-            idx += 64
+            Overrides[y * 64 + x] = (OverrideBitmap, x * 24, y * 24, 24, 24)
+
+
+def LoadEntranceImages():
+    """Load the entrance icon strip"""
+    if EntranceEditorItem.EntranceImages is not None: return
+    EntranceEditorItem.EntranceImages = QtGui.QPixmap('reggiedata/entrances.png')
 
 
 Level = None
@@ -1526,6 +1711,7 @@ PathsNonFrozen = True
 PaintingEntrance = None
 PaintingEntranceListIndex = None
 NumberFont = None
+NumberFontHeight = None
 NumberFontBold = None
 GridEnabled = False
 RestoredFromAutoSave = False
@@ -1539,7 +1725,7 @@ def createHorzLine():
 
 def LoadNumberFont():
     """Creates a valid font we can use to display the item numbers"""
-    global NumberFont
+    global NumberFont, NumberFontHeight
     if NumberFont is not None: return
 
     # this is a really crappy method, but I can't think of any other way
@@ -1552,6 +1738,9 @@ def LoadNumberFont():
     else:
         NumberFont = QtGui.QFont('Sans', 8)
 
+    # used to vertically center numbers on entrances and path nodes
+    NumberFontHeight = QtGui.QFontMetrics(NumberFont).ascent() * 2/3
+
 def LoadNumberFontBold():
     """Creates a valid font we can use to display the item numbers"""
     global NumberFontBold
@@ -1581,33 +1770,139 @@ def SetDirty(noautosave=False):
         pass
 
 
-def MapPositionToZoneID(zones, x, y):
+def GetZoneBounds(zones):
+    """
+    Returns the edges of each zone, for passing to MapPositionToZoneID.
+    Do this once rather than for every position being looked up
+    """
+    bounds = []
+    for zone in zones:
+        r = zone.ZoneRect
+        left, top, right, bottom = r.left(), r.top(), r.right(), r.bottom()
+        # (QRectF.contains() is always False for empty rects)
+        nonempty = left != right and top != bottom
+        bounds.append((left, top, right, bottom, nonempty, zone.zoneID))
+    return bounds
+
+
+def MapPositionToZoneID(zonebounds, x, y):
     """Returns the zone ID containing or nearest the specified position"""
-    id = 0
+    # almost everything is inside a zone, so check that first without
+    # working out any distances
+    for id, (left, top, right, bottom, nonempty, zoneID) in enumerate(zonebounds):
+        if nonempty and left <= x <= right and top <= y <= bottom: return id
+
     minimumdist = -1
     rval = -1
 
-    for zone in zones:
-        r = zone.ZoneRect
-        if r.contains(x,y): return id
-
+    for left, top, right, bottom, nonempty, zoneID in zonebounds:
         xdist = 0
         ydist = 0
-        if x <= r.left(): xdist = r.left() - x
-        if x >= r.right(): xdist = x - r.right()
-        if y <= r.top(): ydist = r.top() - y
-        if y >= r.bottom(): ydist = y - r.bottom()
+        if x <= left: xdist = left - x
+        if x >= right: xdist = x - right
+        if y <= top: ydist = top - y
+        if y >= bottom: ydist = y - bottom
 
-        dist = (xdist**2+ydist**2)**0.5
+        # no need for the square root just to compare distances
+        dist = xdist*xdist + ydist*ydist
         if dist < minimumdist or minimumdist == -1:
             minimumdist = dist
-            rval = zone.zoneID
-
-        id += 1
+            rval = zoneID
 
     return rval
 
 
+def MapPositionsToZoneIDs(zones, positions):
+    """
+    Returns the zone ID containing or nearest each (x, y) position in a
+    list, all in one go. Positions map to zone 0 if there are no zones
+    """
+    zonebounds = GetZoneBounds(zones)
+    if not zonebounds: return [0] * len(positions)
+
+    f_MapPositionToZoneID = MapPositionToZoneID
+    return [f_MapPositionToZoneID(zonebounds, x, y) for x, y in positions]
+
+
+# Struct formats for the level blocks
+BlockHeaderStruct = struct.Struct('>II')
+OptionsStruct = struct.Struct('>IIHhLBBBx')
+EntranceStruct = struct.Struct('>HHxxxxBBBBxBBBHBB')
+SpriteStruct = struct.Struct('>HHH8sxx')
+SpriteSaveStruct = struct.Struct('>HHH6sBcxx') # with the zone ID
+LoadedSpriteStruct = struct.Struct('>Hxx')
+BoundingStruct = struct.Struct('>4lHHhh')
+BackgroundStruct = struct.Struct('>xBhhhhHHHxxxBxxxx')
+ZoneStruct = struct.Struct('>HHHHHHBBBBxBBBBxBB')
+LocationStruct = struct.Struct('>HHHHBxxx')
+CamProfileStruct = struct.Struct('>xxxxxxxxxxxxBBBBxxBx')
+LayerObjectStruct = struct.Struct('>HHHHH')
+PathStruct = struct.Struct('>BxHHH')
+PathNodeStruct = struct.Struct('>HHffhxx')
+
+
+def RecordsFormat(recstruct, count):
+    """Returns the struct format for count consecutive records"""
+    fmt = recstruct.format
+    if not isinstance(fmt, str): fmt = fmt.decode('ascii') # Python < 3.7
+    return '>' + fmt[1:] * count
+
+
+def UnpackRecords(recstruct, data, count=None, offset=0):
+    """
+    Unpacks count consecutive records with the given (big-endian)
+    struct from data, with a single struct call for the whole lot.
+    Returns a list of tuples. If count is None, as many records as there
+    are room for are unpacked
+    """
+    if count is None:
+        count = (len(data) - offset) // recstruct.size
+    if count == 0: return []
+
+    values = struct.unpack_from(RecordsFormat(recstruct, count), data, offset)
+    fields = iter(values)
+    return list(zip(*[fields] * (len(values) // count)))
+
+
+def PackRecords(recstruct, records):
+    """
+    Packs a list of records (sequences of values) with the given struct
+    into a single bytes object, with one struct call for the whole lot
+    """
+    if not records: return b''
+    return struct.pack(RecordsFormat(recstruct, len(records)), *[value for record in records for value in record])
+
+
+def FindAreaFiles(arc, area=None):
+    """
+    Goes through the files in a level archive, and returns the number of
+    areas in it, followed by the course file and the three layer files
+    for the given area (None for any that are missing)
+    """
+    wanted = {}
+    if area is not None:
+        wanted['course%d.bin' % area] = 0
+        wanted['course%d_bgdatL0.bin' % area] = 1
+        wanted['course%d_bgdatL1.bin' % area] = 2
+        wanted['course%d_bgdatL2.bin' % area] = 3
+
+    found = [None]*4
+    areacount = 0
+    for item,val in arc.files:
+        if val is None: continue # it's a folder
+
+        fname = item[item.rfind('/')+1:]
+        idx = wanted.get(fname)
+        if idx is not None:
+            found[idx] = val
+
+        if fname.startswith('course') and fname[6:7].isdigit():
+            maxarea = int(fname[6])
+            if maxarea > areacount: areacount = maxarea
+
+    return (areacount,) + tuple(found)
+
+
 class LevelUnit():
     """Class for a full NSMBWii level archive"""
     def newLevel(self):
@@ -1717,44 +2012,12 @@ class LevelUnit():
         self.arc = archive.U8.load(arcdata)
 
         # this is a hackish method but let's go through the U8 files
-        reqcourse = 'course%d.bin' % area
-        reql0 = 'course%d_bgdatL0.bin' % area
-        reql1 = 'course%d_bgdatL1.bin' % area
-        reql2 = 'course%d_bgdatL2.bin' % area
-
-        course = None
-        l0 = None
-        l1 = None
-        l2 = None
         self.areanum = area
-        self.areacount = 0
-
-        for item,val in self.arc.files:
-            if val is not None:
-                # it's a file
-                fname = item[item.rfind('/')+1:]
-                if fname == reqcourse:
-                    course = val
-                elif fname == reql0:
-                    l0 = val
-                elif fname == reql1:
-                    l1 = val
-                elif fname == reql2:
-                    l2 = val
-
-                if fname.startswith('course'):
-                    maxarea = int(fname[6])
-                    if maxarea > self.areacount: self.areacount = maxarea
+        self.areacount, course, l0, l1, l2 = FindAreaFiles(self.arc, area)
 
         # load in the course file and blocks
-        self.blocks = [None]*14
-        getblock = struct.Struct('>II')
-        for i in range(14):
-            data = getblock.unpack_from(course, i*8)
-            if data[1] == 0:
-                self.blocks[i] = b''
-            else:
-                self.blocks[i] = course[data[0]:data[0]+data[1]]
+        blocktable = UnpackRecords(BlockHeaderStruct, course, 14)
+        self.blocks = [course[offset:offset+size] if size else b'' for offset, size in blocktable]
 
         # load stuff from individual blocks
         self.LoadMetadata() # block 1
@@ -1767,7 +2030,7 @@ class LevelUnit():
         self.LoadPaths() # blocks 13 and 14
 
         # load the editor metadata
-        block1pos = getblock.unpack_from(course, 0)
+        block1pos = blocktable[0]
         if block1pos[0] != 0x70:
             rdsize = block1pos[0] - 0x70
             rddata = course[0x70:block1pos[0]]
@@ -1833,34 +2096,20 @@ class LevelUnit():
         if len(rdata) % 4 != 0:
             rdata += b'\0' * (4 - (len(rdata) % 4))
 
-        # save the main course file
-        # we'll be passing over the blocks array two times
-        # using ctypes.create_string_buffer here because it offers mutable strings
-        # and works directly with struct.pack_into(), so it's a win-win situation for me
-        FileLength = (14 * 8) + len(rdata)
-        for block in self.blocks:
-            FileLength += len(block)
-
-        course = create_string_buffer(FileLength)
-        saveblock = struct.Struct('>II')
-
-        HeaderOffset = 0
+        # save the main course file: the block table, then the editor
+        # metadata, then the blocks themselves
+        blocktable = []
         FileOffset = (14 * 8) + len(rdata)
-        struct.pack_into('{0}s'.format(len(rdata)), course, 0x70, rdata)
         for block in self.blocks:
-            blocksize = len(block)
-            saveblock.pack_into(course, HeaderOffset, FileOffset, blocksize)
-            if blocksize > 0:
-                course[FileOffset:FileOffset+blocksize] = block
-            HeaderOffset += 8
-            FileOffset += blocksize
-
+            blocktable.append((FileOffset, len(block)))
+            FileOffset += len(block)
 
+        course = b''.join([PackRecords(BlockHeaderStruct, blocktable), rdata] + self.blocks)
 
         # place it into the U8 archive
         arc = self.arc
         areanum = self.areanum
-        arc['course/course%d.bin' % areanum] = course.raw
+        arc['course/course%d.bin' % areanum] = course
         arc['course/course%d_bgdatL0.bin' % areanum] = self.SaveLayer(0)
         arc['course/course%d_bgdatL1.bin' % areanum] = self.SaveLayer(1)
         arc['course/course%d_bgdatL2.bin' % areanum] = self.SaveLayer(2)
@@ -1886,135 +2135,71 @@ class LevelUnit():
     def LoadOptions(self):
         """Loads block 2, the general options"""
         optdata = self.blocks[1]
-        optstruct = struct.Struct('>IIHhLBBBx')
         offset = 0
-        data = optstruct.unpack_from(optdata,offset)
+        data = OptionsStruct.unpack_from(optdata,offset)
         defEventsA, defEventsB, self.wrapFlag, self.timeLimit, self.unk1, self.startEntrance, self.unk2, self.unk3 = data
         self.defEvents = defEventsA | defEventsB << 32
 
     def LoadEntrances(self):
         """Loads block 7, the entrances"""
         entdata = self.blocks[6]
-        entcount = len(entdata) // 20
-        entstruct = struct.Struct('>HHxxxxBBBBxBBBHBB')
-        offset = 0
-        entrances = []
-        for i in range(entcount):
-            data = entstruct.unpack_from(entdata,offset)
-            entrances.append(EntranceEditorItem(data[0], data[1], data[2], data[3], data[4], data[5], data[6], data[7], data[8], data[9], data[10], data[11]))
-            offset += 20
-        self.entrances = entrances
+        obj = EntranceEditorItem
+        self.entrances = [obj(*data) for data in UnpackRecords(EntranceStruct, entdata)]
 
     def LoadSprites(self):
         """Loads block 8, the sprites"""
         spritedata = self.blocks[7]
-        sprcount = len(spritedata) // 16
-        sprstruct = struct.Struct('>HHH8sxx')
-        offset = 0
-        sprites = []
-
-        unpack = sprstruct.unpack_from
-        append = sprites.append
         obj = SpriteEditorItem
-        for i in range(sprcount):
-            data = unpack(spritedata,offset)
-            append(obj(data[0], data[1], data[2], data[3]))
-            offset += 16
-        self.sprites = sprites
+        self.sprites = [obj(*data) for data in UnpackRecords(SpriteStruct, spritedata)]
 
     def LoadZones(self):
         """Loads block 3, the bounding preferences"""
         bdngdata = self.blocks[2]
-        count = len(bdngdata) // 24
-        bdngstruct = struct.Struct('>4lHHhh')
-        offset = 0
-        bounding = []
-        for i in range(count):
-            datab = bdngstruct.unpack_from(bdngdata,offset)
-            bounding.append([datab[0], datab[1], datab[2], datab[3], datab[4], datab[5], datab[6], datab[7]])
-            offset += 24
+        bounding = [list(data) for data in UnpackRecords(BoundingStruct, bdngdata)]
         self.bounding = bounding
 
         """Loads block 5, the top level background values"""
         bgAdata = self.blocks[4]
-        bgAcount = len(bgAdata) // 24
-        bgAstruct = struct.Struct('>xBhhhhHHHxxxBxxxx')
-        offset = 0
-        bgA = []
-        for i in range(bgAcount):
-            data = bgAstruct.unpack_from(bgAdata,offset)
-            bgA.append([data[0], data[1], data[2], data[3], data[4], data[5], data[6], data[7], data[8]])
-            offset += 24
+        bgA = [list(data) for data in UnpackRecords(BackgroundStruct, bgAdata)]
         self.bgA = bgA
 
         """Loads block 6, the bottom level background values"""
         bgBdata = self.blocks[5]
-        bgBcount = len(bgBdata) // 24
-        bgBstruct = struct.Struct('>xBhhhhHHHxxxBxxxx')
-        offset = 0
-        bgB = []
-        for i in range(bgBcount):
-            datab = bgBstruct.unpack_from(bgBdata,offset)
-            bgB.append([datab[0], datab[1], datab[2], datab[3], datab[4], datab[5], datab[6], datab[7], datab[8]])
-            offset += 24
+        bgB = [list(data) for data in UnpackRecords(BackgroundStruct, bgBdata)]
         self.bgB = bgB
 
         """Loads block 10, the zone data"""
+        # zones refer to the blocks above by ID
+        boundingByID = {block[4]: block for block in bounding}
+        bgAByID = {block[0]: block for block in bgA}
+        bgBByID = {block[0]: block for block in bgB}
+
         zonedata = self.blocks[9]
-        zonestruct = struct.Struct('>HHHHHHBBBBxBBBBxBB')
-        count = len(zonedata) // 24
-        offset = 0
-        zones = []
-        for i in range(count):
-            dataz = zonestruct.unpack_from(zonedata,offset)
-            zones.append(ZoneItem(dataz[0], dataz[1], dataz[2], dataz[3], dataz[4], dataz[5], dataz[6], dataz[7], dataz[8], dataz[9], dataz[10], dataz[11], dataz[12], dataz[13], dataz[14], dataz[15], bounding, bgA, bgB, i))
-            offset += 24
-        self.zones = zones
+        self.zones = [ZoneItem(*(dataz + (boundingByID, bgAByID, bgBByID, i))) for i, dataz in enumerate(UnpackRecords(ZoneStruct, zonedata))]
 
     def LoadLocations(self):
         """Loads block 11, the locations"""
         locdata = self.blocks[10]
-        locstruct = struct.Struct('>HHHHBxxx')
-        count = len(locdata) // 12
-        offset = 0
-        locations = []
-        for i in range(count):
-            data = locstruct.unpack_from(locdata, offset)
-            locations.append(LocationEditorItem(data[0], data[1], data[2], data[3], data[4]))
-            offset += 12
-        self.locations = locations
+        obj = LocationEditorItem
+        self.locations = [obj(*data) for data in UnpackRecords(LocationStruct, locdata)]
 
     def LoadCamProfiles(self):
         """Loads block 12, the camera profiles"""
         profiledata = self.blocks[11]
-        profilestruct = struct.Struct('>xxxxxxxxxxxxBBBBxxBx')
-        count = len(profiledata) // 20
-        offset = 0
         camprofiles = []
-        for i in range(count):
-            data = profilestruct.unpack_from(profiledata, offset)
+        for i, data in enumerate(UnpackRecords(CamProfileStruct, profiledata)):
             if i > 0 or any(data):
                 camprofiles.append([data[4], data[1], data[2]])
-            offset += 20
         self.camprofiles = camprofiles
 
 
     def LoadLayer(self, idx, layerdata):
         """Loads a specific object layer from a string"""
-        objcount = len(layerdata) // 10
-        objstruct = struct.Struct('>HHHHH')
-        offset = 0
         z = (2 - idx) * 8192
 
-        layer = self.layers[idx]
-        append = layer.append
         obj = LevelObjectEditorItem
-        unpack = objstruct.unpack_from
-        for i in range(objcount):
-            data = unpack(layerdata,offset)
-            append(obj(data[0] >> 12, data[0] & 4095, idx, data[1], data[2], data[3], data[4], z))
-            z += 1
-            offset += 10
+        self.layers[idx].extend([obj(data[0] >> 12, data[0] & 4095, idx, data[1], data[2], data[3], data[4], z + i)
+            for i, data in enumerate(UnpackRecords(LayerObjectStruct, layerdata))])
 
     def LoadPaths(self):
         # Path struct: >BxHHH
@@ -2025,207 +2210,115 @@ class LevelUnit():
 
         # TODO: Render path, and everything above that
         """Loads paths"""
-        pathdata = self.blocks[12]
-        pathcount = len(pathdata) // 8
-        pathstruct = struct.Struct('>BxHHH')
-        offset = 0
-        unpack = pathstruct.unpack_from
         pathinfo = []
         paths = []
-        for i in range(pathcount):
-            data = unpack(pathdata, offset)
+        for data in UnpackRecords(PathStruct, self.blocks[12]):
             nodes = self.LoadPathNodes(data[1], data[2])
-            add2p = {'id': int(data[0]),
-                     'nodes': [],
-                     'loops': data[3] == 2
-                     }
-            for node in nodes:
-                add2p['nodes'].append(node)
-            pathinfo.append(add2p)
-
-
-            offset += 8
-
-        for i in range(pathcount):
-            xpi = pathinfo[i]
-            for j in range(len(xpi['nodes'])):
-                xpj = xpi['nodes'][j]
-                nobjx = None if ((j+1) == len(xpi['nodes'])) else xpi['nodes'][j+1]['x']
-                nobjy = None if ((j+1) == len(xpi['nodes'])) else xpi['nodes'][j+1]['y']
+            xpi = {'id': int(data[0]),
+                   'nodes': nodes,
+                   'loops': data[3] == 2
+                   }
+            pathinfo.append(xpi)
+
+            # each node's item also needs the position of the next node
+            lastnode = len(nodes) - 1
+            for j, xpj in enumerate(nodes):
+                nobjx = None if j == lastnode else nodes[j+1]['x']
+                nobjy = None if j == lastnode else nodes[j+1]['y']
                 paths.append(PathEditorItem(xpj['x'], xpj['y'], nobjx, nobjy, xpi, xpj))
 
-
         self.pathdata = pathinfo
         self.paths = paths
 
 
     def LoadPathNodes(self, startindex, count):
-        ret = []
-        nodedata = self.blocks[13]
-        nodestruct = struct.Struct('>HHffhxx')
-        offset = startindex*16
-        unpack = nodestruct.unpack_from
-        for i in range(count):
-            data = unpack(nodedata, offset)
-            ret.append({'x':int(data[0]),
-                        'y':int(data[1]),
-                        'speed':float(data[2]),
-                        'accel':float(data[3]),
-                        'delay':int(data[4])
-                        #'id':i
-            })
-            offset += 16
-        return ret
+        # the struct already gives ints and floats in the right places
+        return [{'x': x, 'y': y, 'speed': speed, 'accel': accel, 'delay': delay}
+                for x, y, speed, accel, delay in UnpackRecords(PathNodeStruct, self.blocks[13], count, startindex*16)]
 
 
     def SaveMetadata(self):
         """Saves the tileset names back to block 1"""
-        self.blocks[0] = b''.join([self.tileset0.encode('latin-1').ljust(32, b'\0'),
-                                   self.tileset1.encode('latin-1').ljust(32, b'\0'),
-                                   self.tileset2.encode('latin-1').ljust(32, b'\0'),
-                                   self.tileset3.encode('latin-1').ljust(32, b'\0')])
+        names = (self.tileset0, self.tileset1, self.tileset2, self.tileset3)
+        self.blocks[0] = b''.join([name.encode('latin-1').ljust(32, b'\0') for name in names])
 
     def SaveOptions(self):
         """Saves block 2, the general options"""
-        optstruct = struct.Struct('>IIHhLBBBx')
-        buffer = create_string_buffer(20)
-        optstruct.pack_into(buffer, 0, self.defEvents & 0xFFFFFFFF, self.defEvents >> 32, self.wrapFlag, self.timeLimit, self.unk1, self.startEntrance, self.unk2, self.unk3)
-        self.blocks[1] = buffer.raw
+        self.blocks[1] = OptionsStruct.pack(self.defEvents & 0xFFFFFFFF, self.defEvents >> 32, self.wrapFlag, self.timeLimit, self.unk1, self.startEntrance, self.unk2, self.unk3)
 
     def SaveLayer(self, idx):
         """Saves an object layer to a string"""
-        layer = self.layers[idx]
-        offset = 0
-        objstruct = struct.Struct('>HHHHH')
-        buffer = create_string_buffer((len(layer) * 10) + 2)
         f_int = int
-        for obj in layer:
-            objstruct.pack_into(buffer, offset, f_int((obj.tileset << 12) | obj.type), f_int(obj.objx), f_int(obj.objy), f_int(obj.width), f_int(obj.height))
-            offset += 10
-        buffer[offset] = b'\xff'
-        buffer[offset+1] = b'\xff'
-        return buffer.raw
+        records = [(f_int((obj.tileset << 12) | obj.type), f_int(obj.objx), f_int(obj.objy), f_int(obj.width), f_int(obj.height)) for obj in self.layers[idx]]
+        return PackRecords(LayerObjectStruct, records) + b'\xff\xff'
 
     def SaveEntrances(self):
         """Saves the entrances back to block 7"""
-        offset = 0
-        entstruct = struct.Struct('>HHxxxxBBBBxBBBHBB')
-        buffer = create_string_buffer(len(self.entrances) * 20)
-        zonelist = self.zones
-        for entrance in self.entrances:
-            zoneID = MapPositionToZoneID(zonelist, entrance.objx, entrance.objy)
-            if zoneID < 0:
-                # This can happen if the level has no zones
-                zoneID = 0
-            entstruct.pack_into(buffer, offset, int(entrance.objx), int(entrance.objy), int(entrance.entid), int(entrance.destarea), int(entrance.destentrance), int(entrance.enttype), zoneID, int(entrance.entlayer), int(entrance.entpath), int(entrance.entsettings), int(entrance.exittomap), int(entrance.cpdirection))
-            offset += 20
-        self.blocks[6] = buffer.raw
+        zoneIDs = MapPositionsToZoneIDs(self.zones, [(entrance.objx, entrance.objy) for entrance in self.entrances])
+        records = [(int(entrance.objx), int(entrance.objy), int(entrance.entid), int(entrance.destarea), int(entrance.destentrance), int(entrance.enttype), zoneID, int(entrance.entlayer), int(entrance.entpath), int(entrance.entsettings), int(entrance.exittomap), int(entrance.cpdirection))
+            for entrance, zoneID in zip(self.entrances, zoneIDs)]
+        self.blocks[6] = PackRecords(EntranceStruct, records)
 
     def SavePaths(self):
         """Saves the paths back to block 13"""
-        pathstruct = struct.Struct('>BxHHH')
-        nodecount = 0
-        for path in self.pathdata:
-            nodecount += len(path['nodes'])
-        nodebuffer = create_string_buffer(nodecount * 16)
-        nodeoffset = 0
+        nodedata = []
         nodeindex = 0
-        offset = 0
-        buffer = create_string_buffer(len(self.pathdata) * 8)
+        records = []
         #[20:28:38]  [@Treeki] struct Path { unsigned char id; char padding; unsigned short startNodeIndex; unsigned short nodeCount; unsigned short unknown; };
         for path in self.pathdata:
             if len(path['nodes']) < 1: continue
-            nodebuffer = self.SavePathNodes(nodebuffer, nodeoffset, path['nodes'])
+            nodedata.append(self.SavePathNodes(path['nodes']))
 
-            pathstruct.pack_into(buffer, offset, int(path['id']), int(nodeindex), int(len(path['nodes'])), 2 if path['loops'] else 0)
-            offset += 8
-            nodeoffset += len(path['nodes']) * 16
+            records.append((int(path['id']), int(nodeindex), int(len(path['nodes'])), 2 if path['loops'] else 0))
             nodeindex += len(path['nodes'])
-        self.blocks[12] = buffer.raw
-        self.blocks[13] = nodebuffer.raw
 
-    def SavePathNodes(self, buffer, offst, nodes):
-        """Saves the pathnodes back to block 14"""
-        offset = int(offst)
+        # empty paths are skipped, but still leave a zeroed entry at the end
+        padding = b'\0' * (PathStruct.size * (len(self.pathdata) - len(records)))
+        self.blocks[12] = PackRecords(PathStruct, records) + padding
+        self.blocks[13] = b''.join(nodedata)
+
+    def SavePathNodes(self, nodes):
+        """Saves the pathnodes of one path, for block 14"""
         #[20:29:04]  [@Treeki] struct PathNode { unsigned short x; unsigned short y; float speed; float unknownMaybeAccel; short unknown; char padding[2]; }
-        nodestruct = struct.Struct('>HHffhxx')
-        for node in nodes:
-            nodestruct.pack_into(buffer, offset, int(node['x']), int(node['y']), float(node['speed']), float(node['accel']), int(node['delay']))
-            offset += 16
-        return buffer
+        records = [(int(node['x']), int(node['y']), float(node['speed']), float(node['accel']), int(node['delay'])) for node in nodes]
+        return PackRecords(PathNodeStruct, records)
 
     def SaveSprites(self):
         """Saves the sprites back to block 8"""
-        offset = 0
-        sprstruct = struct.Struct('>HHH6sBBxx')
-        buffer = create_string_buffer((len(self.sprites) * 16) + 4)
         f_int = int
-        for sprite in self.sprites:
-            sprstruct.pack_into(buffer, offset, f_int(sprite.type), f_int(sprite.objx), f_int(sprite.objy), sprite.spritedata[:6], sprite.zoneID, ord(sprite.spritedata[7]))
-            offset += 16
-        buffer[offset] = b'\xff'
-        buffer[offset+1] = b'\xff'
-        buffer[offset+2] = b'\xff'
-        buffer[offset+3] = b'\xff'
-        self.blocks[7] = buffer.raw
+        records = [(f_int(sprite.type), f_int(sprite.objx), f_int(sprite.objy), sprite.spritedata[:6], sprite.zoneID, sprite.spritedata[7:8]) for sprite in self.sprites]
+        self.blocks[7] = PackRecords(SpriteSaveStruct, records) + b'\xff\xff\xff\xff'
 
     def SaveLoadedSprites(self):
         """Saves the list of loaded sprites back to block 9"""
-        ls = []
-        for sprite in self.sprites:
-            if sprite.type not in ls: ls.append(sprite.type)
-        ls.sort()
-
-        offset = 0
-        sprstruct = struct.Struct('>Hxx')
-        buffer = create_string_buffer(len(ls) * 4)
-        for s in ls:
-            sprstruct.pack_into(buffer, offset, int(s))
-            offset += 4
-        self.blocks[8] = buffer.raw
+        ls = sorted({sprite.type for sprite in self.sprites})
+        self.blocks[8] = PackRecords(LoadedSpriteStruct, [(int(s),) for s in ls])
 
 
     def SaveZones(self):
         """Saves blocks 10, 3, 5 and 6, the zone data, boundings, bgA and bgB data respectively"""
-        bdngstruct = struct.Struct('>4lHHhh')
-        bgAstruct = struct.Struct('>xBhhhhHHHxxxBxxxx')
-        bgBstruct = struct.Struct('>xBhhhhHHHxxxBxxxx')
-        zonestruct = struct.Struct('>HHHHHHBBBBxBBBBxBB')
-        offset = 0
-        i = 0
-        zcount = len(Level.zones)
-        buffer2 = create_string_buffer(24*zcount)
-        buffer4 = create_string_buffer(24*zcount)
-        buffer5 = create_string_buffer(24*zcount)
-        buffer9 = create_string_buffer(24*zcount)
-        for z in Level.zones:
+        bounding = []
+        bgA = []
+        bgB = []
+        zones = []
+        for i, z in enumerate(Level.zones):
             if z.objx < 0: z.objx = 0
             if z.objy < 0: z.objy = 0
-            bdngstruct.pack_into(buffer2, offset, z.yupperbound, z.ylowerbound, z.yupperbound2, z.ylowerbound2, i, z.mpcamzoomadjust, z.yupperbound3, z.ylowerbound3)
-            bgAstruct.pack_into(buffer4, offset, i, z.XscrollA, z.YscrollA, z.YpositionA, z.XpositionA, z.bg1A, z.bg2A, z.bg3A, z.ZoomA)
-            bgBstruct.pack_into(buffer5, offset, i, z.XscrollB, z.YscrollB, z.YpositionB, z.XpositionB, z.bg1B, z.bg2B, z.bg3B, z.ZoomB)
-            zonestruct.pack_into(buffer9, offset, z.objx, z.objy, z.width, z.height, z.modeldark, z.terraindark, i, i, z.cammode, z.camzoom, z.visibility, i, i, z.direction, z.music, z.sfxmod)
-            offset += 24
-            i += 1
+            bounding.append((z.yupperbound, z.ylowerbound, z.yupperbound2, z.ylowerbound2, i, z.mpcamzoomadjust, z.yupperbound3, z.ylowerbound3))
+            bgA.append((i, z.XscrollA, z.YscrollA, z.YpositionA, z.XpositionA, z.bg1A, z.bg2A, z.bg3A, z.ZoomA))
+            bgB.append((i, z.XscrollB, z.YscrollB, z.YpositionB, z.XpositionB, z.bg1B, z.bg2B, z.bg3B, z.ZoomB))
+            zones.append((z.objx, z.objy, z.width, z.height, z.modeldark, z.terraindark, i, i, z.cammode, z.camzoom, z.visibility, i, i, z.direction, z.music, z.sfxmod))
 
-        self.blocks[2] = buffer2.raw
-        self.blocks[4] = buffer4.raw
-        self.blocks[5] = buffer5.raw
-        self.blocks[9] = buffer9.raw
+        self.blocks[2] = PackRecords(BoundingStruct, bounding)
+        self.blocks[4] = PackRecords(BackgroundStruct, bgA)
+        self.blocks[5] = PackRecords(BackgroundStruct, bgB)
+        self.blocks[9] = PackRecords(ZoneStruct, zones)
 
 
     def SaveLocations(self):
         """Saves block 11, the location data"""
-        locstruct = struct.Struct('>HHHHBxxx')
-        offset = 0
-        zcount = len(Level.locations)
-        buffer = create_string_buffer(12*zcount)
-
-        for z in Level.locations:
-            locstruct.pack_into(buffer, offset, int(z.objx), int(z.objy), int(z.width), int(z.height), int(z.id))
-            offset += 12
-
-        self.blocks[10] = buffer.raw
+        records = [(int(z.objx), int(z.objy), int(z.width), int(z.height), int(z.id)) for z in Level.locations]
+        self.blocks[10] = PackRecords(LocationStruct, records)
 
 
     def SaveCamProfiles(self):
@@ -2250,62 +2343,34 @@ class LevelUnit():
         # confusing behavior. (It can never be activated because it's
         # tied to "event 0," which doesn't exist.)
 
-        profilestruct = struct.Struct('>xxxxxxxxxxxxBBBBxxBx')
-        bdngstruct = struct.Struct('>4lHHhh')
-
-        buffer = create_string_buffer(20 * (len(Level.camprofiles) + 1))
-        buffer2 = create_string_buffer(len(self.blocks[2]) + 24)
-        buffer2[:len(self.blocks[2])] = self.blocks[2]
 
-        offset2 = len(self.blocks[2])
-        bdngid = offset2 // 20
+        bdngid = len(self.blocks[2]) // 20
 
-        offset = 20  # empty first profile to work around game bug
-        for p in Level.camprofiles:
-            profilestruct.pack_into(buffer, offset, bdngid, p[1], p[2], 0, p[0])
-            offset += 20
+        records = [(bdngid, p[1], p[2], 0, p[0]) for p in Level.camprofiles]
+        emptyprofile = b'\0' * CamProfileStruct.size  # to work around game bug
 
-        bdngstruct.pack_into(buffer2, offset2, 0, 0, 0, 0, bdngid, 15, 0, 0)
+        self.blocks[11] = emptyprofile + PackRecords(CamProfileStruct, records)
+        self.blocks[2] = self.blocks[2] + BoundingStruct.pack(0, 0, 0, 0, bdngid, 15, 0, 0)
 
-        self.blocks[11] = buffer.raw
-        self.blocks[2] = buffer2.raw
 
-
-    def RemoveFromLayer(self, obj):
-        """Removes a specific object from the level and updates Z indexes accordingly"""
-        layer = self.layers[obj.layer]
-        idx = layer.index(obj)
-        del layer[idx]
-        for i in range(idx,len(layer)):
-            upd = layer[i]
-            upd.setZValue(upd.zValue() - 1)
+    def RemoveItems(self, items):
+        """
+        Removes several objects, sprites and locations from the level,
+        letting each item type take out its own items in one pass
+        """
+        for cls in (LevelObjectEditorItem, SpriteEditorItem, LocationEditorItem):
+            batch = [obj for obj in items if isinstance(obj, cls)]
+            if batch: cls.RemoveFromLevel(self, batch)
 
     def SortSpritesByZone(self):
         """Sorts the sprite list by zone ID so it will work in-game"""
 
-        split = {}
-        zones = []
-
-        f_MapPositionToZoneID = MapPositionToZoneID
-        zonelist = self.zones
-
-        for sprite in self.sprites:
-            zone = f_MapPositionToZoneID(zonelist, sprite.objx, sprite.objy)
-            if zone < 0:
-                # This can happen if the level has no zones
-                zone = 0
+        zoneIDs = MapPositionsToZoneIDs(self.zones, [(sprite.objx, sprite.objy) for sprite in self.sprites])
+        for sprite, zone in zip(self.sprites, zoneIDs):
             sprite.zoneID = zone
-            if zone not in split:
-                split[zone] = []
-                zones.append(zone)
-            split[zone].append(sprite)
-
-        newlist = []
-        zones.sort()
-        for z in zones:
-            newlist += split[z]
 
-        self.sprites = newlist
+        # sorting is stable, so sprites keep their order within each zone
+        self.sprites = sorted(self.sprites, key=lambda sprite: sprite.zoneID)
 
 
     def LoadReggieInfo(self, data):
@@ -2366,12 +2431,14 @@ class LevelEditorItem(QtWidgets.QGraphicsItem):
             # snap even further if Shift isn't held
             # but -only- if OverrideSnapping is off
             if not OverrideSnapping:
+                # (integer maths only; negative positions get clamped below)
                 if QtWidgets.QApplication.keyboardModifiers() == QtCore.Qt.KeyboardModifier.AltModifier:
-                    newpos.setX(int(int((newpos.x() + 0.75) / 1.5) * 1.5))
-                    newpos.setY(int(int((newpos.y() + 0.75) / 1.5) * 1.5))
+                    # nearest multiple of 1.5, rounded down to an integer
+                    newpos.setX((int(newpos.x() * 4) + 3) // 6 * 3 // 2)
+                    newpos.setY((int(newpos.y() * 4) + 3) // 6 * 3 // 2)
                 else:
-                    newpos.setX(int(int((newpos.x() + 6) / 12) * 12))
-                    newpos.setY(int(int((newpos.y() + 6) / 12) * 12))
+                    newpos.setX((int(newpos.x()) + 6) // 12 * 12)
+                    newpos.setY((int(newpos.y()) + 6) // 12 * 12)
 
             x = newpos.x()
             y = newpos.y()
@@ -2383,8 +2450,8 @@ class LevelEditorItem(QtWidgets.QGraphicsItem):
             if y > 12264: newpos.setY(12264)
 
             # update the data
-            x = int(newpos.x() / 1.5)
-            y = int(newpos.y() / 1.5)
+            x = int(newpos.x() * 2) // 3
+            y = int(newpos.y() * 2) // 3
             if x != self.objx or y != self.objy:
                 updRect = QtCore.QRectF(self.x(), self.y(), self.BoundingRect.width(), self.BoundingRect.height())
                 if self.scene() is not None:
@@ -2407,6 +2474,18 @@ class LevelEditorItem(QtWidgets.QGraphicsItem):
         """Required for Qt"""
         return self.BoundingRect
 
+    def SetBoundingRect(self, rect):
+        """
+        Replaces BoundingRect, only telling the scene about a geometry
+        change (which invalidates its index) if the rect really changed
+        """
+        old = getattr(self, 'BoundingRect', None)
+        if old is not None and old == rect:
+            self.update()
+        else:
+            self.prepareGeometryChange()
+            self.BoundingRect = rect
+
 
 class LevelObjectEditorItem(LevelEditorItem):
     """Level editor item that represents an ingame object"""
@@ -2466,8 +2545,7 @@ class LevelObjectEditorItem(LevelEditorItem):
 
     def UpdateRects(self):
         """Recreates the bounding and selection rects"""
-        self.prepareGeometryChange()
-        self.BoundingRect = QtCore.QRectF(0,0,24*self.width,24*self.height)
+        self.SetBoundingRect(QtCore.QRectF(0,0,24*self.width,24*self.height))
         self.SelectionRect = QtCore.QRectF(0,0,24*self.width-1,24*self.height-1)
         self.GrabberRect = QtCore.QRectF(24*self.width-5,24*self.height-5,5,5)
         self.LevelRect = QtCore.QRectF(self.objx,self.objy,self.width,self.height)
@@ -2482,8 +2560,8 @@ class LevelObjectEditorItem(LevelEditorItem):
 
             # snap to 24x24
             newpos = qm(value)
-            newpos.setX(int((newpos.x() + 12) / 24) * 24)
-            newpos.setY(int((newpos.y() + 12) / 24) * 24)
+            newpos.setX((int(newpos.x()) + 12) // 24 * 24)
+            newpos.setY((int(newpos.y()) + 12) // 24 * 24)
             x = newpos.x()
             y = newpos.y()
 
@@ -2494,8 +2572,8 @@ class LevelObjectEditorItem(LevelEditorItem):
             if y > 12288: newpos.setY(12288)
 
             # update the data
-            x = int(newpos.x() / 24)
-            y = int(newpos.y() / 24)
+            x = int(newpos.x()) // 24
+            y = int(newpos.y()) // 24
             if x != self.objx or y != self.objy:
                 self.LevelRect.moveTo(x,y)
 
@@ -2552,8 +2630,8 @@ class LevelObjectEditorItem(LevelEditorItem):
         if self.isSelected() and self.GrabberRect.contains(event.pos()):
             # start dragging
             self.dragging = True
-            self.dragstartx = int((event.pos().x() - 10) / 24)
-            self.dragstarty = int((event.pos().y() - 10) / 24)
+            self.dragstartx = int(event.pos().x() - 10) // 24
+            self.dragstarty = int(event.pos().y() - 10) // 24
             event.accept()
         else:
             LevelEditorItem.mousePressEvent(self, event)
@@ -2566,8 +2644,8 @@ class LevelObjectEditorItem(LevelEditorItem):
             # resize it
             dsx = self.dragstartx
             dsy = self.dragstarty
-            clickedx = int((event.pos().x() - 10) / 24)
-            clickedy = int((event.pos().y() - 10) / 24)
+            clickedx = int(event.pos().x() - 10) // 24
+            clickedy = int(event.pos().y() - 10) // 24
 
             cx = self.objx
             cy = self.objy
@@ -2586,8 +2664,7 @@ class LevelObjectEditorItem(LevelEditorItem):
 
                 self.updateObjCache()
 
-                oldrect = self.BoundingRect
-                oldrect.translate(cx * 24, cy * 24)
+                oldrect = self.BoundingRect.translated(cx * 24, cy * 24)
                 newrect = QtCore.QRectF(self.x(), self.y(), self.width * 24, self.height * 24)
                 updaterect = oldrect.united(newrect)
 
@@ -2601,18 +2678,45 @@ class LevelObjectEditorItem(LevelEditorItem):
             LevelEditorItem.mouseMoveEvent(self, event)
 
 
+    @classmethod
+    def RemoveFromLevel(cls, level, objs):
+        """Removes objects from the level and updates Z indexes accordingly"""
+        removed = set(objs)
+        for n in {obj.layer for obj in objs}:
+            layer = level.layers[n]
+            shift = 0
+            start = next(i for i, obj in enumerate(layer) if obj in removed)
+            kept = []
+            for obj in layer[start:]:
+                if obj in removed:
+                    shift += 1
+                else:
+                    obj.setZValue(obj.zValue() - shift)
+                    kept.append(obj)
+            layer[start:] = kept
+
     def delete(self):
         """Delete the object from the level"""
-        Level.RemoveFromLayer(self)
+        self.RemoveFromLevel(Level, [self])
         self.scene().update(self.x(), self.y(), self.BoundingRect.width(), self.BoundingRect.height())
 
 
 class ZoneItem(LevelEditorItem):
     """Level editor item that represents a zone"""
+    Pens = {} # DarkMode -> (outline pen, title pen), made on first use
+
+    # drag corner -> whether it moves the (left, top) edges rather than
+    # the (right, bottom) ones
+    CornerEdges = {1: (True, True), 2: (False, True), 3: (True, False), 4: (False, False)}
 
     def __init__(self, a, b, c, d, e, f, g, h, i, j, k, l, m, n, o, p, boundings, bgA, bgB, id):
-        """Creates a zone with specific data"""
+        """
+        Creates a zone with specific data. boundings, bgA and bgB map
+        block IDs to the bounding and background settings blocks
+        """
         super(ZoneItem, self).__init__()
+        # zones can be huge, so ask for the exposed rect in paint()
+        self.setFlag(QtWidgets.QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption, True)
 
         self.font = NumberFontBold
         self.id = id
@@ -2637,49 +2741,14 @@ class ZoneItem(LevelEditorItem):
         self.sfxmod = p
         self.UpdateRects()
 
-        bounding = None
-        id = self.block3id
-        for block in boundings:
-            if block[4] == id: bounding = block
-
-        self.yupperbound = bounding[0]
-        self.ylowerbound = bounding[1]
-        self.yupperbound2 = bounding[2]
-        self.ylowerbound2 = bounding[3]
-        self.entryid = bounding[4]
-        self.mpcamzoomadjust = bounding[5]
-        self.yupperbound3 = bounding[6]
-        self.ylowerbound3 = bounding[7]
-
-        bgABlock = None
-        id = self.block5id
-        for block in bgA:
-            if block[0] == id: bgABlock = block
-
-        self.entryidA = bgABlock[0]
-        self.XscrollA = bgABlock[1]
-        self.YscrollA = bgABlock[2]
-        self.YpositionA = bgABlock[3]
-        self.XpositionA = bgABlock[4]
-        self.bg1A = bgABlock[5]
-        self.bg2A = bgABlock[6]
-        self.bg3A = bgABlock[7]
-        self.ZoomA = bgABlock[8]
-
-        bgBBlock = None
-        id = self.block6id
-        for block in bgB:
-            if block[0] == id: bgBBlock = block
-
-        self.entryidB = bgBBlock[0]
-        self.XscrollB = bgBBlock[1]
-        self.YscrollB = bgBBlock[2]
-        self.YpositionB = bgBBlock[3]
-        self.XpositionB = bgBBlock[4]
-        self.bg1B = bgBBlock[5]
-        self.bg2B = bgBBlock[6]
-        self.bg3B = bgBBlock[7]
-        self.ZoomB = bgBBlock[8]
+        (self.yupperbound, self.ylowerbound, self.yupperbound2, self.ylowerbound2,
+         self.entryid, self.mpcamzoomadjust, self.yupperbound3, self.ylowerbound3) = boundings[self.block3id]
+
+        (self.entryidA, self.XscrollA, self.YscrollA, self.YpositionA, self.XpositionA,
+         self.bg1A, self.bg2A, self.bg3A, self.ZoomA) = bgA[self.block5id]
+
+        (self.entryidB, self.XscrollB, self.YscrollB, self.YpositionB, self.XpositionB,
+         self.bg1B, self.bg2B, self.bg3B, self.ZoomB) = bgB[self.block6id]
 
         self.dragging = False
         self.dragstartx = -1
@@ -2695,42 +2764,61 @@ class ZoneItem(LevelEditorItem):
     def UpdateTitle(self):
         """Updates the zone's title"""
         self.title = 'Zone %d' % (self.id+1)
+        titlerect = QtGui.QFontMetricsF(self.font).boundingRect(self.title)
+        self.TitleRect = titlerect.translated(self.TitlePos).adjusted(-2,-2,2,2)
 
 
     def UpdateRects(self):
         """Updates the zone's bounding rectangle"""
-        self.prepareGeometryChange()
-        self.BoundingRect = QtCore.QRectF(0,0,self.width*1.5,self.height*1.5)
-        self.ZoneRect = QtCore.QRectF(self.objx,self.objy,self.width,self.height)
-        self.DrawRect = QtCore.QRectF(3,3,int(self.width*1.5)-6,int(self.height*1.5)-6)
-        self.GrabberRectTL = QtCore.QRectF(0,0,5,5)
-        self.GrabberRectTR = QtCore.QRectF(int(self.width*1.5)-5,0,5,5)
-        self.GrabberRectBL = QtCore.QRectF(0,int(self.height*1.5)-5,5,5)
-        self.GrabberRectBR = QtCore.QRectF(int(self.width*1.5)-5,int(self.height*1.5)-5,5,5)
+        QRectF = QtCore.QRectF
+        w = self.width*1.5
+        h = self.height*1.5
+        iw = int(w)
+        ih = int(h)
+        self.SetBoundingRect(QRectF(0,0,w,h))
+        self.ZoneRect = QRectF(self.objx,self.objy,self.width,self.height)
+        self.DrawRect = QRectF(3,3,iw-6,ih-6)
+        self.InnerRect = self.DrawRect.adjusted(2,2,-2,-2) # inside the outline
+        self.GrabberRectTL = QRectF(0,0,5,5)
+        self.GrabberRectTR = QRectF(iw-5,0,5,5)
+        self.GrabberRectBL = QRectF(0,ih-5,5,5)
+        self.GrabberRectBR = QRectF(iw-5,ih-5,5,5)
+        self.GrabberRects = [self.GrabberRectTL, self.GrabberRectTR, self.GrabberRectBL, self.GrabberRectBR]
 
 
     def paint(self, painter, option, widget):
         """Paints the zone on screen"""
-        #painter.setClipRect(option.exposedRect)
+        # only the outline, title and grabbers are drawn, so there's
+        # nothing to do if just the middle of the zone was exposed
+        exposed = option.exposedRect
+        if self.InnerRect.contains(exposed) and not exposed.intersects(self.TitleRect): return
+
+        painter.setClipRect(exposed)
         painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
 
-        if DarkMode:
-            textColor = QtGui.QColor.fromRgba(0xFFCAE0F9)
-        else:
-            textColor = QtGui.QColor.fromRgba(0xFF2C4054)
+        pens = ZoneItem.Pens.get(DarkMode)
+        if pens is None:
+            if DarkMode:
+                textColor = QtGui.QColor.fromRgba(0xFFCAE0F9)
+            else:
+                textColor = QtGui.QColor.fromRgba(0xFF2C4054)
+            pens = (QtGui.QPen(QtGui.QColor.fromRgba(0xB093C9FF), 3), QtGui.QPen(textColor, 3))
+            ZoneItem.Pens[DarkMode] = pens
+        outlinePen, titlePen = pens
 
-        painter.setPen(QtGui.QPen(QtGui.QColor.fromRgba(0xB093C9FF), 3))
+        painter.setPen(outlinePen)
         painter.drawRect(self.DrawRect)
 
-        painter.setPen(QtGui.QPen(textColor, 3))
-        painter.setFont(self.font)
-        painter.drawText(self.TitlePos, self.title)
+        if exposed.intersects(self.TitleRect):
+            painter.setPen(titlePen)
+            painter.setFont(self.font)
+            painter.drawText(self.TitlePos, self.title)
 
-        GrabberColour = QtGui.QColor.fromRgb(255,255,255,255)
-        painter.fillRect(self.GrabberRectTL, GrabberColour)
-        painter.fillRect(self.GrabberRectTR, GrabberColour)
-        painter.fillRect(self.GrabberRectBL, GrabberColour)
-        painter.fillRect(self.GrabberRectBR, GrabberColour)
+        grabbers = [grabber for grabber in self.GrabberRects if exposed.intersects(grabber)]
+        if grabbers:
+            painter.setPen(QtCore.Qt.PenStyle.NoPen)
+            painter.setBrush(QtGui.QColor.fromRgb(255,255,255,255))
+            painter.drawRects(grabbers)
 
 
     def mousePressEvent(self, event):
@@ -2753,8 +2841,8 @@ class ZoneItem(LevelEditorItem):
 
         if self.dragging:
             # start dragging
-            self.dragstartx = int(event.scenePos().x() / 1.5)
-            self.dragstarty = int(event.scenePos().y() / 1.5)
+            self.dragstartx = int(event.scenePos().x() * 2) // 3
+            self.dragstarty = int(event.scenePos().y() * 2) // 3
             self.draginitialx1 = self.objx
             self.draginitialy1 = self.objy
             self.draginitialx2 = self.objx + self.width
@@ -2768,8 +2856,10 @@ class ZoneItem(LevelEditorItem):
         """Overrides mouse movement events if needed for resizing"""
         if event.buttons() & QtCore.Qt.MouseButton.LeftButton and self.dragging:
             # resize it
-            clickedx = int(event.scenePos().x() / 1.5)
-            clickedy = int(event.scenePos().y() / 1.5)
+            # (these round negative positions down rather than towards
+            # zero, but those always get clamped below anyway)
+            clickedx = int(event.scenePos().x() * 2) // 3
+            clickedy = int(event.scenePos().y() * 2) // 3
 
             x1 = self.draginitialx1
             y1 = self.draginitialy1
@@ -2789,33 +2879,24 @@ class ZoneItem(LevelEditorItem):
             MIN_W = 300
             MIN_H = 200
 
-            if self.dragcorner == 1: # TL
-                x1 += deltax
-                y1 += deltay
-                if x1 < MIN_X: x1 = MIN_X
-                if y1 < MIN_Y: y1 = MIN_Y
-                if x2 - x1 < MIN_W: x1 = x2 - MIN_W
-                if y2 - y1 < MIN_H: y1 = y2 - MIN_H
-
-            elif self.dragcorner == 2: # TR
-                x2 += deltax
-                y1 += deltay
-                if y1 < MIN_Y: y1 = MIN_Y
-                if x2 - x1 < MIN_W: x2 = x1 + MIN_W
-                if y2 - y1 < MIN_H: y1 = y2 - MIN_H
-
-            elif self.dragcorner == 3: # BL
-                x1 += deltax
-                y2 += deltay
-                if x1 < MIN_X: x1 = MIN_X
-                if x2 - x1 < MIN_W: x1 = x2 - MIN_W
-                if y2 - y1 < MIN_H: y2 = y1 + MIN_H
-
-            elif self.dragcorner == 4: # BR
-                x2 += deltax
-                y2 += deltay
-                if x2 - x1 < MIN_W: x2 = x1 + MIN_W
-                if y2 - y1 < MIN_H: y2 = y1 + MIN_H
+            # the moving left/top edge is kept inside the level, then
+            # pulled back if the zone got too small; the moving right/
+            # bottom edge only has to keep the zone big enough
+            movesleft, movestop = self.CornerEdges[self.dragcorner]
+            if movesleft:
+                x1 = min(max(x1 + deltax, MIN_X), x2 - MIN_W)
+            else:
+                x2 = max(x2 + deltax, x1 + MIN_W)
+            if movestop:
+                y1 = min(max(y1 + deltay, MIN_Y), y2 - MIN_H)
+            else:
+                y2 = max(y2 + deltay, y1 + MIN_H)
+
+            # most mouse moves don't change the zone at all, so don't
+            # bother redrawing anything for those
+            if x1 == self.objx and y1 == self.objy and x2 - x1 == self.width and y2 - y1 == self.height:
+                event.accept()
+                return
 
             self.objx = x1
             self.objy = y1
@@ -2884,27 +2965,32 @@ class LocationEditorItem(LevelEditorItem):
 
     def UpdateRects(self):
         """Updates the location's bounding rectangle"""
-        self.prepareGeometryChange()
-        self.BoundingRectWithoutTitleRect = QtCore.QRectF(0,0,self.width*1.5,self.height*1.5)
-        self.BoundingRect = self.BoundingRectWithoutTitleRect | self.TitleRect
-        self.SelectionRect = QtCore.QRectF(self.objx*1.5,self.objy*1.5,self.width*1.5,self.height*1.5)
-        self.ZoneRect = QtCore.QRectF(self.objx,self.objy,self.width,self.height)
-        self.DrawRect = QtCore.QRectF(1,1,self.width*1.5-2,self.height*1.5-2)
-        self.GrabberRect = QtCore.QRectF(1.5*self.width-6,1.5*self.height-6,5,5)
+        QRectF = QtCore.QRectF
+        w = self.width*1.5
+        h = self.height*1.5
+        self.BoundingRectWithoutTitleRect = QRectF(0,0,w,h)
+        self.SetBoundingRect(self.BoundingRectWithoutTitleRect | self.TitleRect)
+        self.SelectionRect = QRectF(self.objx*1.5,self.objy*1.5,w,h)
+        self.ZoneRect = QRectF(self.objx,self.objy,self.width,self.height)
+        self.DrawRect = QRectF(1,1,w-2,h-2)
+        self.GrabberRect = QRectF(w-6,h-6,5,5)
+
+        # We basically make a vertically-flipped "L" shape if the location
+        # is small, so that you can click on the ID number to select the location
+        qpp = QtGui.QPainterPath()
+        qpp.addRect(self.BoundingRectWithoutTitleRect)
+        qpp.addRect(self.TitleRect)
+        self.ShapePath = qpp
 
 
     def shape(self):
         """
         self.BoundingRect is big enough to include self.TitleRect (so
         the ID text can be painted), but that makes the hit-detection
-        region too large if the rect is small.
+        region too large if the rect is small. (The actual shape is
+        built in UpdateRects)
         """
-        # We basically make a vertically-flipped "L" shape if the location
-        # is small, so that you can click on the ID number to select the location
-        qpp = QtGui.QPainterPath()
-        qpp.addRect(self.BoundingRectWithoutTitleRect)
-        qpp.addRect(self.TitleRect)
-        return qpp
+        return self.ShapePath
 
 
     def paint(self, painter, option, widget):
@@ -2933,8 +3019,8 @@ class LocationEditorItem(LevelEditorItem):
         if self.isSelected() and self.GrabberRect.contains(event.pos()):
             # start dragging
             self.dragging = True
-            self.dragstartx = int(event.pos().x() / 1.5)
-            self.dragstarty = int(event.pos().y() / 1.5)
+            self.dragstartx = int(event.pos().x() * 2) // 3
+            self.dragstarty = int(event.pos().y() * 2) // 3
             event.accept()
         else:
             LevelEditorItem.mousePressEvent(self, event)
@@ -2947,8 +3033,8 @@ class LocationEditorItem(LevelEditorItem):
             # resize it
             dsx = self.dragstartx
             dsy = self.dragstarty
-            clickedx = event.pos().x() / 1.5
-            clickedy = event.pos().y() / 1.5
+            clickedx = int(event.pos().x() * 2) // 3
+            clickedy = int(event.pos().y() * 2) // 3
 
             cx = self.objx
             cy = self.objy
@@ -2965,8 +3051,7 @@ class LocationEditorItem(LevelEditorItem):
                 self.width += clickedx - dsx
                 self.height += clickedy - dsy
 
-                oldrect = self.BoundingRect
-                oldrect.translate(cx*1.5, cy*1.5)
+                oldrect = self.BoundingRect.translated(cx*1.5, cy*1.5)
                 newrect = QtCore.QRectF(self.x(), self.y(), self.width*1.5, self.height*1.5)
                 updaterect = oldrect.united(newrect)
 
@@ -2982,9 +3067,15 @@ class LocationEditorItem(LevelEditorItem):
             LevelEditorItem.mouseMoveEvent(self, event)
 
 
+    @classmethod
+    def RemoveFromLevel(cls, level, locs):
+        """Removes locations from the level"""
+        removed = set(locs)
+        level.locations[:] = [loc for loc in level.locations if loc not in removed]
+
     def delete(self):
         """Delete the zone from the level"""
-        Level.locations.remove(self)
+        self.RemoveFromLevel(Level, [self])
         self.scene().update(self.x(), self.y(), self.BoundingRect.width(), self.BoundingRect.height())
 
 
@@ -2995,6 +3086,9 @@ class SpriteEditorItem(LevelEditorItem):
     BoundingRect = QtCore.QRectF(0,0,24,24)
     SelectionRect = QtCore.QRectF(0,0,23,23)
     RoundedRect = QtCore.QRectF(1,1,22,22)
+    BoxStyles = {} # (DarkMode, selected) -> (brush, pen), made on first use
+    RoundedPaths = {} # (xsize, ysize) -> outline path, shared by same-sized sprites
+    BoxPixmaps = {} # (type, DarkMode, selected, xsize, ysize, scale) -> rendered box
 
     def __init__(self, type, x, y, data):
         """Creates a sprite with specific data"""
@@ -3090,21 +3184,26 @@ class SpriteEditorItem(LevelEditorItem):
         """Creates all the rectangles for the sprite"""
         type = self.type
 
-        self.prepareGeometryChange()
-
         xs = self.xsize
         ys = self.ysize
 
-        self.BoundingRect = QtCore.QRectF(0,0,xs*1.5,ys*1.5)
+        self.SetBoundingRect(QtCore.QRectF(0,0,xs*1.5,ys*1.5))
         self.SelectionRect = QtCore.QRectF(0,0,int(xs*1.5-1),int(ys*1.5-1))
         self.RoundedRect = QtCore.QRectF(1,1,xs*1.5-2,ys*1.5-2)
+        path = SpriteEditorItem.RoundedPaths.get((xs, ys))
+        if path is None:
+            path = QtGui.QPainterPath()
+            path.addRoundedRect(self.RoundedRect, 4, 4)
+            SpriteEditorItem.RoundedPaths[(xs, ys)] = path
+        self.RoundedPath = path
         self.LevelRect = (QtCore.QRectF((self.objx + self.xoffset) / 16, (self.objy + self.yoffset) / 16, self.xsize/16, self.ysize/16))
 
     def itemChange(self, change, value):
         """Makes sure positions don't go out of bounds and updates them as necessary"""
 
         if change == QtWidgets.QGraphicsItem.GraphicsItemChange.ItemPositionChange:
-            if self.scene() is None: return value
+            scene = self.scene()
+            if scene is None: return value
             if self.ChangingPos: return value
 
             xOffset = self.xoffset
@@ -3116,17 +3215,23 @@ class SpriteEditorItem(LevelEditorItem):
             # snap even further if Shift isn't held
             # but -only- if OverrideSnapping is off
             if not OverrideSnapping:
+                nx = newpos.x()
+                ny = newpos.y()
                 if QtWidgets.QApplication.keyboardModifiers() == QtCore.Qt.KeyboardModifier.AltModifier:
-                    newpos.setX((int((newpos.x() + 0.75) / 1.5) * 1.5))
-                    newpos.setY((int((newpos.y() + 0.75) / 1.5) * 1.5))
+                    # nearest multiple of 1.5 (negative positions get
+                    # clamped below)
+                    newpos.setX((int(nx * 4) + 3) // 6 * 1.5)
+                    newpos.setY((int(ny * 4) + 3) // 6 * 1.5)
                 else:
                     #xCompensation = (xOffset % 16) * 1.5
                     #yCompensation = (yOffset % 16) * 1.5
                     #newpos.setX((int((newpos.x() + 6 - xCompensation) / 12) * 12) + xCompensation)
                     #newpos.setY((int((newpos.y() + 6 - yCompensation) / 12) * 12) + yCompensation)
 
-                    newpos.setX((int((int((newpos.x() + 6) / 1.5) - xOffset) / 8) * 8 + xOffset) * 1.5)
-                    newpos.setY((int((int((newpos.y() + 6) / 1.5) - yOffset) / 8) * 8 + yOffset) * 1.5)
+                    # (these truncate towards zero on purpose, since the
+                    # offset can make the inner value negative)
+                    newpos.setX((int((int((nx + 6) / 1.5) - xOffset) / 8) * 8 + xOffset) * 1.5)
+                    newpos.setY((int((int((ny + 6) / 1.5) - yOffset) / 8) * 8 + yOffset) * 1.5)
 
             x = newpos.x()
             y = newpos.y()
@@ -3144,15 +3249,18 @@ class SpriteEditorItem(LevelEditorItem):
             if x != self.objx or y != self.objy:
                 #oldrect = self.BoundingRect
                 #oldrect.translate(self.objx*1.5, self.objy*1.5)
-                updRect = QtCore.QRectF(self.x(), self.y(), self.BoundingRect.width(), self.BoundingRect.height())
+                selfx = self.x()
+                selfy = self.y()
+                updRect = QtCore.QRectF(selfx, selfy, self.BoundingRect.width(), self.BoundingRect.height())
                 #self.scene().update(updRect.united(oldrect))
-                self.scene().update(updRect)
+                scene.update(updRect)
 
                 self.LevelRect.moveTo((x+xOffset) / 16, (y+yOffset) / 16)
 
                 if hasattr(self, 'aux'):
-                    auxUpdRect = QtCore.QRectF(self.x()+self.aux.x(), self.y()+self.aux.y(), self.aux.BoundingRect.width(), self.aux.BoundingRect.height())
-                    self.scene().update(auxUpdRect)
+                    aux = self.aux
+                    auxUpdRect = QtCore.QRectF(selfx+aux.x(), selfy+aux.y(), aux.BoundingRect.width(), aux.BoundingRect.height())
+                    scene.update(auxUpdRect)
 
                 oldx = self.objx
                 oldy = self.objy
@@ -3187,52 +3295,115 @@ class SpriteEditorItem(LevelEditorItem):
         painter.setClipRect(option.exposedRect)
         painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
 
-        selectedOpacity, unselectedOpacity = itemBoxFillOpacities()
-        if DarkMode:
-            fillR, fillG, fillB = 30, 110, 196
-        else:
-            fillR, fillG, fillB = 0, 92, 196
-
         if self.customPaint:
             self.customPainter(self, painter)
             if self.isSelected():
                 painter.setPen(QtGui.QPen(QtCore.Qt.GlobalColor.white, 1, QtCore.Qt.PenStyle.DotLine))
                 painter.drawRect(self.SelectionRect)
                 painter.fillRect(self.SelectionRect, QtGui.QColor.fromRgb(255,255,255,64))
+        elif widget is None:
+            # not being painted into a view (e.g. a screenshot), so
+            # don't fill the cache with pixmaps at some one-off scale
+            self.DrawBox(painter, self.isSelected())
         else:
-            if self.isSelected():
-                painter.setBrush(QtGui.QBrush(QtGui.QColor.fromRgb(fillR,fillG,fillB,selectedOpacity)))
-                painter.setPen(QtGui.QPen(QtCore.Qt.GlobalColor.white, 1))
+            # boxes only depend on the type, size and state, so every
+            # sprite that looks the same shares one pre-rendered pixmap
+            selected = self.isSelected()
+            scale = painter.worldTransform().m11()
+            device = painter.device()
+            if hasattr(device, 'devicePixelRatioF'): # (Qt 5.6+)
+                scale *= device.devicePixelRatioF()
+            key = (self.type, DarkMode, selected, self.xsize, self.ysize, scale)
+            pix = SpriteEditorItem.BoxPixmaps.get(key)
+            if pix is None:
+                pix = self.RenderBox(selected, scale)
+                SpriteEditorItem.BoxPixmaps[key] = pix
+
+            painter.drawPixmap(QtCore.QRectF(0, 0, pix.width() / scale, pix.height() / scale), pix, QtCore.QRectF(pix.rect()))
+
+    def RenderBox(self, selected, scale):
+        """Renders the plain sprite box into a pixmap at the given scale"""
+        pix = QtGui.QPixmap(int(math.ceil(self.BoundingRect.width() * scale)), int(math.ceil(self.BoundingRect.height() * scale)))
+        pix.fill(QtCore.Qt.GlobalColor.transparent)
+
+        painter = QtGui.QPainter(pix)
+        painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+        painter.scale(scale, scale)
+        self.DrawBox(painter, selected)
+        painter.end()
+
+        return pix
+
+    def DrawBox(self, painter, selected):
+        """Draws the plain sprite box and number"""
+        style = SpriteEditorItem.BoxStyles.get((DarkMode, selected))
+        if style is None:
+            selectedOpacity, unselectedOpacity = itemBoxFillOpacities()
+            if DarkMode:
+                fillR, fillG, fillB = 30, 110, 196
             else:
-                painter.setBrush(QtGui.QBrush(QtGui.QColor.fromRgb(fillR,fillG,fillB,unselectedOpacity)))
-                painter.setPen(QtGui.QPen(QtCore.Qt.GlobalColor.black, 1))
-            painter.drawRoundedRect(self.RoundedRect, 4, 4)
+                fillR, fillG, fillB = 0, 92, 196
 
-            painter.setFont(self.font)
-            painter.drawText(self.BoundingRect,QtCore.Qt.AlignmentFlag.AlignCenter,str(self.type))
+            if selected:
+                style = (QtGui.QBrush(QtGui.QColor.fromRgb(fillR,fillG,fillB,selectedOpacity)), QtGui.QPen(QtCore.Qt.GlobalColor.white, 1))
+            else:
+                style = (QtGui.QBrush(QtGui.QColor.fromRgb(fillR,fillG,fillB,unselectedOpacity)), QtGui.QPen(QtCore.Qt.GlobalColor.black, 1))
+            SpriteEditorItem.BoxStyles[(DarkMode, selected)] = style
+
+        painter.setBrush(style[0])
+        painter.setPen(style[1])
+        painter.drawPath(self.RoundedPath)
+
+        painter.setFont(self.font)
+        painter.drawText(self.BoundingRect,QtCore.Qt.AlignmentFlag.AlignCenter,str(self.type))
+
+    @classmethod
+    def RemoveFromLevel(cls, level, sprites):
+        """Removes sprites from the level"""
+        removed = set(sprites)
+        level.sprites[:] = [spr for spr in level.sprites if spr not in removed]
 
     def delete(self):
         """Delete the sprite from the level"""
-        Level.sprites.remove(self)
+        self.RemoveFromLevel(Level, [self])
         self.scene().update(self.x(), self.y(), self.BoundingRect.width(), self.BoundingRect.height())
 
 
 class EntranceEditorItem(LevelEditorItem):
     """Level editor item that represents an entrance"""
-    EntranceImages = None
+    EntranceImages = None # strip of 24x24 icons, indexed by icon type
+    BoxStyles = {} # (DarkMode, selected) -> (brush, pen), made on first use
+
+    # entrance type -> icon type; anything missing uses icon 0
+    IconTypes = {
+        0: 1, 1: 1, # normal
+        2: 2, # door exit
+        3: 4, # pipe up
+        4: 5, # pipe down
+        5: 6, # pipe left
+        6: 7, # pipe right
+        8: 12, # ground pound
+        9: 13, # sliding
+        #0F/15 is unknown?
+        16: 8, # mini pipe up
+        17: 9, # mini pipe down
+        18: 10, # mini pipe left
+        19: 11, # mini pipe right
+        20: 15, # jump out facing right
+        21: 17, # vine entrance
+        23: 14, # boss battle entrance
+        24: 16, # jump out facing left
+        27: 3, # door entrance
+        }
 
     BoundingRect = QtCore.QRectF(0,0,24,24)
 
     def __init__(self, x, y, id, destarea, destentrance, type, zone, layer, path, settings, exittomap, cpd):
         """Creates an entrance with specific data"""
-        if EntranceEditorItem.EntranceImages is None:
-            ei = []
-            src = QtGui.QPixmap('reggiedata/entrances.png')
-            for i in range(18):
-                ei.append(src.copy(i*24,0,24,24))
-            EntranceEditorItem.EntranceImages = ei
-
         super(EntranceEditorItem, self).__init__()
+        # these only look different after an update(), so let Qt keep
+        # the rendered item around between repaints
+        self.setCacheMode(QtWidgets.QGraphicsItem.CacheMode.DeviceCoordinateCache)
 
         self.font = NumberFont
         self.objx = x
@@ -3310,57 +3481,39 @@ class EntranceEditorItem(LevelEditorItem):
         painter.setClipRect(option.exposedRect)
         painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
 
-        selectedOpacity, unselectedOpacity = itemBoxFillOpacities()
-        if DarkMode:
-            fillR, fillG, fillB = 255, 50, 50
-        else:
-            fillR, fillG, fillB = 190, 0, 0
+        selected = self.isSelected()
+        style = EntranceEditorItem.BoxStyles.get((DarkMode, selected))
+        if style is None:
+            selectedOpacity, unselectedOpacity = itemBoxFillOpacities()
+            if DarkMode:
+                fillR, fillG, fillB = 255, 50, 50
+            else:
+                fillR, fillG, fillB = 190, 0, 0
+
+            if selected:
+                style = (QtGui.QBrush(QtGui.QColor.fromRgb(fillR,fillG,fillB,selectedOpacity)), QtGui.QPen(QtCore.Qt.GlobalColor.white, 1))
+            else:
+                style = (QtGui.QBrush(QtGui.QColor.fromRgb(fillR,fillG,fillB,unselectedOpacity)), QtGui.QPen(QtCore.Qt.GlobalColor.black, 1))
+            EntranceEditorItem.BoxStyles[(DarkMode, selected)] = style
 
         painter.setPen(QtCore.Qt.PenStyle.NoPen)
-        if self.isSelected():
-            painter.setBrush(QtGui.QBrush(QtGui.QColor.fromRgb(fillR,fillG,fillB,selectedOpacity)))
-        else:
-            painter.setBrush(QtGui.QBrush(QtGui.QColor.fromRgb(fillR,fillG,fillB,unselectedOpacity)))
+        painter.setBrush(style[0])
         painter.drawRoundedRect(self.RoundedRect, 4, 4)
 
         painter.setBrush(QtCore.Qt.BrushStyle.NoBrush)
-        if self.isSelected():
-            painter.setPen(QtGui.QPen(QtCore.Qt.GlobalColor.white, 1))
-        else:
-            painter.setPen(QtGui.QPen(QtCore.Qt.GlobalColor.black, 1))
+        painter.setPen(style[1])
 
+        icontype = EntranceEditorItem.IconTypes.get(self.enttype, 0)
 
-        icontype = 0
-        enttype = self.enttype
-        if enttype == 0 or enttype == 1: icontype = 1 # normal
-        if enttype == 2: icontype = 2 # door exit
-        if enttype == 3: icontype = 4 # pipe up
-        if enttype == 4: icontype = 5 # pipe down
-        if enttype == 5: icontype = 6 # pipe left
-        if enttype == 6: icontype = 7 # pipe right
-        if enttype == 8: icontype = 12 # ground pound
-        if enttype == 9: icontype = 13 # sliding
-        #0F/15 is unknown?
-        if enttype == 16: icontype = 8 # mini pipe up
-        if enttype == 17: icontype = 9 # mini pipe down
-        if enttype == 18: icontype = 10 # mini pipe left
-        if enttype == 19: icontype = 11 # mini pipe right
-        if enttype == 20: icontype = 15 # jump out facing right
-        if enttype == 21: icontype = 17 # vine entrance
-        if enttype == 23: icontype = 14 # boss battle entrance
-        if enttype == 24: icontype = 16 # jump out facing left
-        if enttype == 27: icontype = 3 # door entrance
-
-        painter.drawPixmap(1,1,22,22,EntranceEditorItem.EntranceImages[icontype],1,1,22,22)
+        painter.drawPixmap(1,1,22,22,EntranceEditorItem.EntranceImages,icontype*24+1,1,22,22)
 
         #painter.drawText(self.BoundingRect,QtCore.Qt.AlignmentFlag.AlignLeft,str(self.entid))
         painter.setFont(self.font)
-        fontheight = QtGui.QFontMetrics(self.font).ascent() * 2/3
-        painter.drawText(QtCore.QPointF(3,7+fontheight/2),str(self.entid))
+        painter.drawText(QtCore.QPointF(3,7+NumberFontHeight/2),str(self.entid))
 
         painter.drawRoundedRect(self.RoundedRect, 4, 4)
 
-        if self.isSelected():
+        if selected:
             #painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing, False)
             #painter.setPen(QtGui.QPen(QtCore.Qt.GlobalColor.black, 1, QtCore.Qt.PenStyle.DotLine))
             #painter.drawRect(self.SelectionRect)
@@ -3378,8 +3531,6 @@ class EntranceEditorItem(LevelEditorItem):
 
     def UpdateRects(self):
         """Recreates the bounding and selection rects"""
-        self.prepareGeometryChange()
-
         if self.enttype in {3, 4}:
             w, h = 2, 1
         elif self.enttype in {5, 6}:
@@ -3387,7 +3538,7 @@ class EntranceEditorItem(LevelEditorItem):
         else:
             w, h = 1, 1
 
-        self.BoundingRect = QtCore.QRectF(0, 0, 24 * w, 24 * h)
+        self.SetBoundingRect(QtCore.QRectF(0, 0, 24 * w, 24 * h))
         self.SelectionRect = QtCore.QRectF(0, 0, 24 * w - 1, 24 * h - 1)
         self.LevelRect = QtCore.QRectF(self.objx / 16, self.objy / 16, 24/16 * w, 24/16 * h)
         self.RoundedRect = QtCore.QRectF(1, 1, 24 * w - 2, 24 * h - 2)
@@ -3398,6 +3549,7 @@ class PathEditorItem(LevelEditorItem):
     BoundingRect = QtCore.QRectF(0,0,24,24)
     SelectionRect = QtCore.QRectF(0,0,23,23)
     RoundedRect = QtCore.QRectF(1,1,22,22)
+    BoxStyles = {} # (DarkMode, selected) -> (brush, pen), made on first use
 
 
     def __init__(self, objx, objy, nobjx, nobjy, pathinfo, nodeinfo):
@@ -3405,6 +3557,7 @@ class PathEditorItem(LevelEditorItem):
 
         global mainWindow
         super(PathEditorItem, self).__init__()
+        self.setCacheMode(QtWidgets.QGraphicsItem.CacheMode.DeviceCoordinateCache)
 
         self.font = NumberFont
         self.objx = objx
@@ -3455,6 +3608,7 @@ class PathEditorItem(LevelEditorItem):
         self.nodeid = self.pathinfo['nodes'].index(self.nodeinfo)
         self.UpdateTooltip()
         self.listitem.setText(self.ListString())
+        self.update() # (the scene update below doesn't redo our cache)
         self.scene().update()
 
         # if node doesn't exist, let Reggie implode!
@@ -3464,24 +3618,27 @@ class PathEditorItem(LevelEditorItem):
         painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
         painter.setClipRect(option.exposedRect)
 
-        selectedOpacity, unselectedOpacity = itemBoxFillOpacities()
+        selected = self.isSelected()
+        style = PathEditorItem.BoxStyles.get((DarkMode, selected))
+        if style is None:
+            selectedOpacity, unselectedOpacity = itemBoxFillOpacities()
+            if selected:
+                style = (QtGui.QBrush(QtGui.QColor.fromRgb(6,249,20,selectedOpacity)), QtGui.QPen(QtCore.Qt.GlobalColor.white, 1))
+            else:
+                style = (QtGui.QBrush(QtGui.QColor.fromRgb(6,249,20,unselectedOpacity)), QtGui.QPen(QtCore.Qt.GlobalColor.black, 1))
+            PathEditorItem.BoxStyles[(DarkMode, selected)] = style
 
-        if self.isSelected():
-            painter.setBrush(QtGui.QBrush(QtGui.QColor.fromRgb(6,249,20,selectedOpacity)))
-            painter.setPen(QtGui.QPen(QtCore.Qt.GlobalColor.white, 1))
-        else:
-            painter.setBrush(QtGui.QBrush(QtGui.QColor.fromRgb(6,249,20,unselectedOpacity)))
-            painter.setPen(QtGui.QPen(QtCore.Qt.GlobalColor.black, 1))
+        painter.setBrush(style[0])
+        painter.setPen(style[1])
         painter.drawRoundedRect(self.RoundedRect, 4, 4)
 
         icontype = 0
 
         painter.setFont(self.font)
-        fontheight = QtGui.QFontMetrics(self.font).ascent() * 2/3
-        painter.drawText(QtCore.QPointF(4,7+fontheight/2),str(self.pathid))
-        painter.drawText(QtCore.QPointF(4,17+fontheight/2),str(self.nodeid))
+        painter.drawText(QtCore.QPointF(4,7+NumberFontHeight/2),str(self.pathid))
+        painter.drawText(QtCore.QPointF(4,17+NumberFontHeight/2),str(self.nodeid))
 
-        if self.isSelected():
+        if selected:
             #painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing, False)
             #painter.setPen(QtGui.QPen(QtCore.Qt.GlobalColor.black, 1, QtCore.Qt.PenStyle.DotLine))
             #painter.drawRect(self.SelectionRect)
@@ -3514,6 +3671,7 @@ class PathEditorLineItem(LevelEditorItem):
     """Level editor item to draw a line between two pathnodes"""
     BoundingRect = QtCore.QRectF(0,0,1,1) #compute later #QtCore.QRectF(0,0,max(sys.float_info),max(sys.float_info)) #Compute later
     #SelectionRect = QtCore.QRectF(0,0,0,0)
+    Pens = None # (line pen, loop-closing pen), made on first use
 
 
 
@@ -3552,11 +3710,8 @@ class PathEditorLineItem(LevelEditorItem):
 
     def computeBoundRectAndPos(self):
         if self.nodelist:
-            xcoords = []
-            ycoords = []
-            for node in self.nodelist:
-                xcoords.append(int(node['x']))
-                ycoords.append(int(node['y']))
+            xcoords = [int(node['x']) for node in self.nodelist]
+            ycoords = [int(node['y']) for node in self.nodelist]
 
             self.objx = (min(xcoords)-4)#*1.5
             self.objy = (min(ycoords)-4)#*1.5
@@ -3571,8 +3726,7 @@ class PathEditorLineItem(LevelEditorItem):
         DirtyOverride += 1
         self.setPos(self.objx * 1.5, self.objy * 1.5)
         DirtyOverride -= 1
-        self.prepareGeometryChange()
-        self.BoundingRect = QtCore.QRectF(0,0,mywidth,myheight)
+        self.SetBoundingRect(QtCore.QRectF(0,0,mywidth,myheight))
 
 
 
@@ -3584,33 +3738,25 @@ class PathEditorLineItem(LevelEditorItem):
         painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
         painter.setClipRect(option.exposedRect)
 
-        linecolor = QtGui.QColor.fromRgb(6,249,20)
-        painter.setBrush(QtGui.QBrush(linecolor))
-        painter.setPen(QtGui.QPen(linecolor, 3, join = QtCore.Qt.PenJoinStyle.RoundJoin, cap = QtCore.Qt.PenCapStyle.RoundCap))
-        ppath = QtGui.QPainterPath()
-
-        lines = []
+        pens = PathEditorLineItem.Pens
+        if pens is None:
+            linecolor = QtGui.QColor.fromRgb(6,249,20)
+            pens = (QtGui.QPen(linecolor, 3, join = QtCore.Qt.PenJoinStyle.RoundJoin, cap = QtCore.Qt.PenCapStyle.RoundCap),
+                    QtGui.QPen(linecolor, 3, join = QtCore.Qt.PenJoinStyle.RoundJoin, cap = QtCore.Qt.PenCapStyle.RoundCap, style = QtCore.Qt.PenStyle.DotLine))
+            PathEditorLineItem.Pens = pens
 
-        firstn = True
+        # the path is drawn as one polyline through all the nodes, rather
+        # than as a separate line per pair of nodes
+        ox = self.x()
+        oy = self.y()
+        points = [QtCore.QPointF(node['x']*1.5 - ox, node['y']*1.5 - oy) for node in self.nodelist]
 
-        snl = self.nodelist
-        for j in range(len(self.nodelist)):
-            if (j+1) < len(self.nodelist):
-                lines.append(QtCore.QLineF(
-                    float(snl[j]['x']*1.5) - self.x(),
-                    float(snl[j]['y']*1.5) - self.y(),
-                    float(snl[j+1]['x']*1.5) - self.x(),
-                    float(snl[j+1]['y']*1.5) - self.y()))
+        painter.setPen(pens[0])
+        painter.drawPolyline(QtGui.QPolygonF(points))
 
-        painter.drawLines(lines)
-
-        painter.setPen(QtGui.QPen(linecolor, 3, join = QtCore.Qt.PenJoinStyle.RoundJoin, cap = QtCore.Qt.PenCapStyle.RoundCap, style = QtCore.Qt.PenStyle.DotLine))
         if self.nodelist[0]['graphicsitem'].pathinfo['loops']:
-            painter.drawLine(QtCore.QLineF(
-                float(snl[-1]['x']*1.5) - self.x(),
-                float(snl[-1]['y']*1.5) - self.y(),
-                float(snl[0]['x']*1.5) - self.x(),
-                float(snl[0]['y']*1.5) - self.y()))
+            painter.setPen(pens[1])
+            painter.drawLine(points[-1], points[0])
 
 
     def delete(self):
@@ -3683,52 +3829,36 @@ class LevelOverviewWidget(QtWidgets.QWidget):
         painter = QtGui.QPainter(self)
         painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing, True)
 
-        self.CalcSize()
+        # the same rects are used for sizing and drawing the overview
+        itemrects = self.ItemRects()
+        zonerects, objrects, spriterects, entrects, locrects = itemrects
+
+        self.CalcSize(itemrects)
         self.Rescale()
         painter.fillRect(event.rect(), self.bgbrush)
         painter.scale(self.scale, self.scale)
-        transform = QtGui.QTransform() / 24
-
-        dr = painter.drawRect
-        fr = painter.fillRect
 
-
-        b = self.viewbrush
+        # one drawRects() call per kind of item, rather than a fill (and
+        # maybe an outline) per item
         painter.setPen(QtGui.QPen(QtGui.QColor.fromRgb(0,255,255), 1))
+        painter.setBrush(self.viewbrush)
+        painter.drawRects(zonerects)
 
-        for zone in Level.zones:
-            rect = transform.mapRect(zone.sceneBoundingRect())
-            fr(rect, b)
-            dr(rect)
-
-        b = self.objbrush
-
-        for layer in Level.layers:
-            for obj in layer:
-                fr(obj.LevelRect, b)
-
-
-        b = self.spritebrush
-
-        for sprite in Level.sprites:
-            fr(sprite.LevelRect, b)
-
-
-        b = self.entrancebrush
+        painter.setPen(QtCore.Qt.PenStyle.NoPen)
+        painter.setBrush(self.objbrush)
+        painter.drawRects(objrects)
 
-        for ent in Level.entrances:
-            fr(ent.LevelRect, b)
+        painter.setBrush(self.spritebrush)
+        painter.drawRects(spriterects)
 
+        painter.setBrush(self.entrancebrush)
+        painter.drawRects(entrects)
 
-        b = self.locationbrush
         painter.setPen(QtGui.QPen(QtCore.Qt.GlobalColor.black, 1))
+        painter.setBrush(self.locationbrush)
+        painter.drawRects(locrects)
 
-        for location in Level.locations:
-            rect = transform.mapRect(location.sceneBoundingRect())
-            fr(rect, b)
-            dr(rect)
-
-        b = self.locationbrush
+        painter.setBrush(QtCore.Qt.BrushStyle.NoBrush)
         painter.setPen(QtGui.QPen(QtCore.Qt.GlobalColor.blue, 1))
         painter.drawRect(QtCore.QRectF(self.Xposlocator/24/self.mainWindowScale,
                                        self.Yposlocator/24/self.mainWindowScale,
@@ -3736,8 +3866,25 @@ class LevelOverviewWidget(QtWidgets.QWidget):
                                        self.Hlocator/24/self.mainWindowScale))
 
 
-    def CalcSize(self):
-        """Calculates self.maxX and self.maxY"""
+    def ItemRects(self):
+        """
+        Returns lists of the zone, object, sprite, entrance and location
+        rects, in overview coordinates
+        """
+        transform = QtGui.QTransform() / 24
+        return (
+            [transform.mapRect(zone.sceneBoundingRect()) for zone in Level.zones],
+            [obj.LevelRect for layer in Level.layers for obj in layer],
+            [sprite.LevelRect for sprite in Level.sprites],
+            [ent.LevelRect for ent in Level.entrances],
+            [transform.mapRect(location.sceneBoundingRect()) for location in Level.locations],
+            )
+
+    def CalcSize(self, itemrects=None):
+        """
+        Calculates self.maxX and self.maxY. itemrects can be passed in
+        if ItemRects() has already been called
+        """
         if Level is None:
             # fixes race condition where this widget's size is calculated
             # after the level is created, but before it's loaded
@@ -3745,24 +3892,9 @@ class LevelOverviewWidget(QtWidgets.QWidget):
             self.maxY = 40
             return
 
-        transform = QtGui.QTransform() / 24
-        rect = QtCore.QRectF()
-
-        for zone in Level.zones:
-            rect |= transform.mapRect(zone.sceneBoundingRect())
-
-        for layer in Level.layers:
-            for obj in layer:
-                rect |= obj.LevelRect
-
-        for sprite in Level.sprites:
-            rect |= sprite.LevelRect
-
-        for ent in Level.entrances:
-            rect |= ent.LevelRect
-
-        for location in Level.locations:
-            rect |= transform.mapRect(location.sceneBoundingRect())
+        if itemrects is None:
+            itemrects = self.ItemRects()
+        rect = functools.reduce(operator.or_, itertools.chain.from_iterable(itemrects), QtCore.QRectF())
 
         self.maxX = rect.right()
         self.maxY = rect.bottom()
@@ -3903,6 +4035,7 @@ class ObjectPickerWidget(QtWidgets.QListView):
         def LoadFromTileset(self, idx):
             """Renders all the object previews for the model"""
             if ObjectDefinitions[idx] is None: return
+            LoadObjDescriptions()
 
             # begin/endResetModel are only in Qt 4.6...
             if QtCompatVersion >= (4,6,0):
@@ -3923,19 +4056,14 @@ class ObjectPickerWidget(QtWidgets.QListView):
                 pm.fill(QtCore.Qt.GlobalColor.transparent)
                 p = QtGui.QPainter()
                 p.begin(pm)
-                y = 0
-
-                for row in obj:
-                    x = 0
-                    for tile in row:
-                        if tile != -1:
-                            if isinstance(Tiles[tile], QtGui.QImage):
-                                p.drawImage(x, y, Tiles[tile])
-                            elif isinstance(Tiles[tile], QtGui.QPixmap):
-                                p.drawPixmap(x, y, Tiles[tile])
-                            # Else, it's probably None, so we shouldn't draw it
-                        x += 24
-                    y += 24
+                drawPixmap = p.drawPixmap
+
+                for y, row in enumerate(obj):
+                    for x, tile in enumerate(row):
+                        if tile == -1: continue
+                        tiledata = Tiles[tile]
+                        if tiledata is not None:
+                            drawPixmap(x * 24, y * 24, *tiledata)
                 p.end()
 
                 self.ritems.append(pm)
@@ -4001,9 +4129,13 @@ class SpritePickerWidget(QtWidgets.QTreeWidget):
                 cnode.setHidden(True)
                 nodelist.append(cnode)
 
-        self.ShownSearchResults = SearchableItems
+        self.ShownSearchResults = set(SearchableItems)
         self.NoSpritesFound.setHidden(True)
 
+        # the item texts never change, so lowercase them once up front
+        # rather than having findItems() walk the whole tree per search
+        self.SearchIndex = [(unicode(item.text(0)).lower(), item) for item in SearchableItems]
+
         self.itemClicked.connect(self.HandleSprReplace)
 
 
@@ -4027,13 +4159,13 @@ class SpritePickerWidget(QtWidgets.QTreeWidget):
 
     def SetSearchString(self, searchfor):
         """Shows the items containing that string"""
-        check = self.SearchResultsCategory
+        searchfor = unicode(searchfor).lower()
+        results = set(item for text, item in self.SearchIndex if searchfor in text)
 
-        rawresults = self.findItems(searchfor, QtCore.Qt.MatchFlag.MatchContains | QtCore.Qt.MatchFlag.MatchRecursive)
-        results = list(filter((lambda x: x.parent() == check), rawresults))
-
-        for x in self.ShownSearchResults: x.setHidden(True)
-        for x in results: x.setHidden(False)
+        # only touch the items whose visibility actually changes, since
+        # every setHidden() makes the tree lay itself out again
+        for x in self.ShownSearchResults - results: x.setHidden(True)
+        for x in results - self.ShownSearchResults: x.setHidden(False)
         self.ShownSearchResults = results
 
         self.NoSpritesFound.setHidden((len(results) != 0))
@@ -4122,53 +4254,40 @@ class SpriteEditorWidget(QtWidgets.QWidget):
         def retrieve(self, data):
             """Extracts the value from the specified nybble(s)"""
             nybble = self.nybble
+            data = bytearray(data)
 
             if isinstance(nybble, tuple):
-                if nybble[1] == (nybble[0] + 2) and (nybble[0] | 1) == 0:
-                    # optimise if it's just one byte
-                    return ord(data[nybble[0] >> 1])
-                else:
-                    # we have to calculate it sadly
-                    # just do it by looping, shouldn't be that bad
-                    value = 0
-                    for n in range(nybble[0], nybble[1]):
-                        value <<= 4
-                        value |= (ord(data[n >> 1]) >> (0 if (n & 1) == 1 else 4)) & 15
-                    return value
+                # each hex digit is one nybble, so the range can just be
+                # sliced out of the hex string
+                return int(binascii.hexlify(data)[nybble[0]:nybble[1]] or b'0', 16)
             else:
                 # we just want one nybble
-                return (ord(data[nybble >> 1]) >> (0 if (nybble & 1) == 1 else 4)) & 15
+                return (data[nybble >> 1] >> (0 if (nybble & 1) == 1 else 4)) & 15
 
 
         def insertvalue(self, data, value):
             """Assigns a value to the specified nybble(s)"""
             nybble = self.nybble
-            sdata = [ord(x) for x in data]
+            sdata = bytearray(data)
 
             if isinstance(nybble, tuple):
-                if nybble[1] == (nybble[0] + 2) and (nybble[0] | 1) == 0:
-                    # just one byte, this is easier
-                    sdata[nybble[0] >> 1] = value & 255
-                else:
-                    # AAAAAAAAAAA
-                    for n in reversed(range(nybble[0], nybble[1])):
-                        cbyte = ord(sdata[n >> 1])
-                        if (n & 1) == 1:
-                            cbyte = (cbyte & 240) | (value & 15)
-                        else:
-                            cbyte = ((value & 15) << 4) | (cbyte & 15)
-                        sdata[n >> 1] = cbyte
-                        value >>= 4
+                # same trick as retrieve(): splice the new digits into
+                # the hex string
+                start, end = nybble
+                if end > start:
+                    hexdata = binascii.hexlify(sdata)
+                    digits = ('%0*x' % (end - start, value & ((1 << ((end - start) * 4)) - 1))).encode('ascii')
+                    sdata = bytearray(binascii.unhexlify(hexdata[:start] + digits + hexdata[end:]))
             else:
                 # only overwrite one nybble
-                cbyte = ord(sdata[nybble >> 1])
+                cbyte = sdata[nybble >> 1]
                 if (nybble & 1) == 1:
                     cbyte = (cbyte & 240) | (value & 15)
                 else:
                     cbyte = ((value & 15) << 4) | (cbyte & 15)
                 sdata[nybble >> 1] = cbyte
 
-            return intsToBytes(sdata)
+            return bytes(sdata)
 
 
     class CheckboxPropertyDecoder(PropertyDecoder):
@@ -4234,7 +4353,7 @@ class SpriteEditorWidget(QtWidgets.QWidget):
         def update(self, data):
             """Updates the value shown by the widget"""
             value = self.retrieve(data)
-            if not self.model.existingLookup[value]:
+            if value not in self.model.existingLookup:
                 self.widget.setCurrentIndex(-1)
                 return
 
@@ -4323,11 +4442,11 @@ class SpriteEditorWidget(QtWidgets.QWidget):
             fields = []
             row = 2
 
-            for f in sprite.fields:
+            for i, f in enumerate(sprite.fields):
                 if f[0] == 0:
                     nf = SpriteEditorWidget.CheckboxPropertyDecoder(f[1], f[2], f[3], f[4], layout, row)
                 elif f[0] == 1:
-                    nf = SpriteEditorWidget.ListPropertyDecoder(f[1], f[2], f[3], f[4], layout, row)
+                    nf = SpriteEditorWidget.ListPropertyDecoder(f[1], f[2], sprite.getListModel(i), f[4], layout, row)
                 elif f[0] == 2:
                     nf = SpriteEditorWidget.ValuePropertyDecoder(f[1], f[2], f[3], f[4], layout, row)
 
@@ -4345,7 +4464,7 @@ class SpriteEditorWidget(QtWidgets.QWidget):
         self.UpdateFlag = True
 
         data = self.data
-        self.raweditor.setText('%02x%02x %02x%02x %02x%02x %02x%02x' % (ord(data[0]), ord(data[1]), ord(data[2]), ord(data[3]), ord(data[4]), ord(data[5]), ord(data[6]), ord(data[7])))
+        self.raweditor.setText('%02x%02x %02x%02x %02x%02x %02x%02x' % tuple(bytearray(data)))
         #self.raweditor.setText(data.encode('hex'))
         self.raweditor.setStyleSheet('')
 
@@ -4369,7 +4488,7 @@ class SpriteEditorWidget(QtWidgets.QWidget):
         data = field.assign(self.data)
         self.data = data
 
-        self.raweditor.setText('%02x%02x %02x%02x %02x%02x %02x%02x' % (ord(data[0]), ord(data[1]), ord(data[2]), ord(data[3]), ord(data[4]), ord(data[5]), ord(data[6]), ord(data[7])))
+        self.raweditor.setText('%02x%02x %02x%02x %02x%02x %02x%02x' % tuple(bytearray(data)))
         #self.raweditor.setText(data.encode('hex'))
         self.raweditor.setStyleSheet('')
 
@@ -5028,25 +5147,11 @@ class LocationEditorWidget(QtWidgets.QWidget):
         right = left+loc.width
         bottom = top+loc.height
 
-        if left % 8 < 4:
-            left -= (left % 8)
-        else:
-            left += 8 - (left % 8)
-
-        if top % 8 < 4:
-            top -= (top % 8)
-        else:
-            top += 8 - (top % 8)
-
-        if right % 8 < 4:
-            right -= (right % 8)
-        else:
-            right += 8 - (right % 8)
-
-        if bottom % 8 < 4:
-            bottom -= (bottom % 8)
-        else:
-            bottom += 8 - (bottom % 8)
+        # round each edge to the nearest multiple of 8
+        left = (left + 4) & ~7
+        top = (top + 4) & ~7
+        right = (right + 4) & ~7
+        bottom = (bottom + 4) & ~7
 
         if right <= left: right += 8
         if bottom <= top: bottom += 8
@@ -5126,6 +5231,8 @@ class LevelScene(QtWidgets.QGraphicsScene):
         layer2 = []
 
         local_Tiles = Tiles
+        missingColor = QtGui.QColor.fromRgb(192, 0, 192)
+        black = QtCore.Qt.GlobalColor.black
 
         x1 = 1024
         y1 = 512
@@ -5165,27 +5272,32 @@ class LevelScene(QtWidgets.QGraphicsScene):
 
                 for row in item.objdata:
                     destrow = tmap[desty]
-                    destx = startx
-                    for tile in row:
-                        if tile is None or tile > 0:
-                            destrow[destx] = tile
-                        destx += 1
+                    if 0 not in row and -1 not in row:
+                        # nothing transparent, so copy the whole row at once
+                        destrow[startx:startx+len(row)] = row
+                    else:
+                        destx = startx
+                        for tile in row:
+                            if tile is None or tile > 0:
+                                destrow[destx] = tile
+                            destx += 1
                     desty += 1
 
             painter.save()
             painter.translate(x1*24, y1*24)
             drawPixmap = painter.drawPixmap
+            fillRect = painter.fillRect
             desty = 0
             for row in tmap:
                 destx = 0
                 for tile in row:
                     if tile is None:
                         # Magenta/black checkerboard for tiles from nonexistent objects
-                        painter.fillRect(destx, desty, 24, 24, QtGui.QColor.fromRgb(192, 0, 192))
-                        painter.fillRect(destx + 12, desty, 12, 12, QtCore.Qt.GlobalColor.black)
-                        painter.fillRect(destx, desty + 12, 12, 12, QtCore.Qt.GlobalColor.black)
+                        fillRect(destx, desty, 24, 24, missingColor)
+                        fillRect(destx + 12, desty, 12, 12, black)
+                        fillRect(destx, desty + 12, 12, 12, black)
                     elif tile > 0 and local_Tiles[tile] is not None:
-                        drawPixmap(destx, desty, local_Tiles[tile])
+                        drawPixmap(destx, desty, *local_Tiles[tile])
                     destx += 24
                 desty += 24
             painter.restore()
@@ -5602,8 +5714,7 @@ class LevelViewWidget(QtWidgets.QGraphicsView):
                 obj.height = height
                 obj.updateObjCache()
 
-                oldrect = obj.BoundingRect
-                oldrect.translate(cx * 24, cy * 24)
+                oldrect = obj.BoundingRect.translated(cx * 24, cy * 24)
                 newrect = QtCore.QRectF(obj.x(), obj.y(), obj.width * 24, obj.height * 24)
                 updaterect = oldrect.united(newrect)
 
@@ -5656,8 +5767,7 @@ class LevelViewWidget(QtWidgets.QGraphicsView):
                 obj.height = height
 #                    obj.updateObjCache()
 
-                oldrect = obj.BoundingRect
-                oldrect.translate(cx * 1.5, cy * 1.5)
+                oldrect = obj.BoundingRect.translated(cx * 1.5, cy * 1.5)
                 newrect = QtCore.QRectF(obj.x(), obj.y(), obj.width * 1.5, obj.height * 1.5)
                 updaterect = oldrect.united(newrect)
 
@@ -6230,6 +6340,7 @@ class LoadingTab(QtWidgets.QWidget):
 class TilesetsTab(QtWidgets.QWidget):
     def __init__(self):
         super(TilesetsTab, self).__init__()
+        LoadTilesetNames()
 
         self.tile0 = QtWidgets.QComboBox()
         self.tile1 = QtWidgets.QComboBox()
@@ -6522,11 +6633,8 @@ class ZonesDialog(QtWidgets.QDialog):
             if result == QtWidgets.QMessageBox.StandardButton.No:
                 return
 
-        a = []
-        b = []
-
-        a.append([0, 0, 0, 0, 0, 15, 0, 0])
-        b.append([0, 0, 0, 0, 0, 10, 10, 10, 0])
+        a = {0: [0, 0, 0, 0, 0, 15, 0, 0]}
+        b = {0: [0, 0, 0, 0, 0, 10, 10, 10, 0]}
         id = len(self.zoneTabs)
         z = ZoneItem(16, 16, 448, 224, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, a, b, b, id)
         ZoneTabName = 'Zone ' + str(id+1)
@@ -6832,6 +6940,7 @@ class ZoneTab(QtWidgets.QWidget):
 
         self.Zone_music = QtWidgets.QComboBox()
         self.Zone_music.setToolTip(musicIdTooltip)
+        LoadMusicNames()
         self.Zone_music.addItems(MusicNames)
         self.Zone_music.setCurrentIndex(z.music)
 
@@ -7106,6 +7215,7 @@ class BGTab(QtWidgets.QWidget):
 
 
     def createBGaViewer(self, z):
+        LoadBgANames()
         self.BGaViewer = QtWidgets.QGroupBox('Preview')
 
         self.background_nameA = QtWidgets.QComboBox()
@@ -7185,6 +7295,7 @@ class BGTab(QtWidgets.QWidget):
 
 
     def createBGbViewer(self, z):
+        LoadBgBNames()
         self.BGbViewer = QtWidgets.QGroupBox('Preview')
 
         self.background_nameB = QtWidgets.QComboBox()
@@ -8238,6 +8349,23 @@ class ReggieWindow(QtWidgets.QMainWindow):
         self.scene.setSelectionArea(paintRect)
 
 
+    def DeleteItems(self, items):
+        """
+        Deletes items from the level and the scene. Objects, sprites and
+        locations are taken out of the level all at once, rather than
+        with a delete() each
+        """
+        batched = (LevelObjectEditorItem, SpriteEditorItem, LocationEditorItem)
+        Level.RemoveItems(items)
+
+        scene = self.scene
+        for obj in items:
+            # (removing an item from the scene repaints where it was)
+            if not isinstance(obj, batched): obj.delete()
+            obj.setSelected(False)
+            scene.removeItem(obj)
+
+
     @QtCoreSlot()
     def Cut(self):
         """Cuts the selected items"""
@@ -8254,16 +8382,12 @@ class ReggieWindow(QtWidgets.QMainWindow):
 
             for obj in selitems:
                 if ii(obj, type_obj):
-                    obj.delete()
-                    obj.setSelected(False)
-                    self.scene.removeItem(obj)
                     clipboard_o.append(obj)
                 elif ii(obj, type_spr):
-                    obj.delete()
-                    obj.setSelected(False)
-                    self.scene.removeItem(obj)
                     clipboard_s.append(obj)
 
+            self.DeleteItems(clipboard_o + clipboard_s)
+
             if len(clipboard_o) > 0 or len(clipboard_s) > 0:
                 SetDirty()
                 self.actions['cut'].setEnabled(False)
@@ -8631,15 +8755,7 @@ class ReggieWindow(QtWidgets.QMainWindow):
         arc = archive.U8.load(arcdata)
 
         # get the area count
-        areacount = 0
-
-        for item,val in arc.files:
-            if val is not None:
-                # it's a file
-                fname = item[item.rfind('/')+1:]
-                if fname.startswith('course'):
-                    maxarea = int(fname[6])
-                    if maxarea > areacount: areacount = maxarea
+        areacount = FindAreaFiles(arc)[0]
 
         # choose one
         dlg = AreaChoiceDialog(areacount)
@@ -8649,27 +8765,7 @@ class ReggieWindow(QtWidgets.QMainWindow):
         area = dlg.areaCombo.currentIndex()+1
 
         # get the required files
-        reqcourse = 'course%d.bin' % area
-        reql0 = 'course%d_bgdatL0.bin' % area
-        reql1 = 'course%d_bgdatL1.bin' % area
-        reql2 = 'course%d_bgdatL2.bin' % area
-
-        course = None
-        l0 = None
-        l1 = None
-        l2 = None
-
-        for item,val in arc.files:
-            if val is not None:
-                fname = item[item.rfind('/')+1:]
-                if fname == reqcourse:
-                    course = val
-                elif fname == reql0:
-                    l0 = val
-                elif fname == reql1:
-                    l1 = val
-                elif fname == reql2:
-                    l2 = val
+        _, course, l0, l1, l2 = FindAreaFiles(arc, area)
 
         # add them to our U8
         newID = Level.areacount + 1
@@ -9133,6 +9229,7 @@ class ReggieWindow(QtWidgets.QMainWindow):
         tr.scale(z / 100.0, z / 100.0)
         self.ZoomLevel = z
         self.view.setTransform(tr)
+        SpriteEditorItem.BoxPixmaps.clear() # only useful at the old zoom level now
         self.levelOverview.mainWindowScale = z/100.0
 
         if towardsCursor:
@@ -9329,6 +9426,9 @@ class ReggieWindow(QtWidgets.QMainWindow):
             progress.setValue(7)
 
         scene = self.scene
+        # adding thousands of items is much quicker without an index, so
+        # it's only built once everything is in (see below)
+        scene.setItemIndexMethod(QtWidgets.QGraphicsScene.ItemIndexMethod.NoIndex)
         scene.clear()
 
         entlist = self.entranceList
@@ -9378,6 +9478,10 @@ class ReggieWindow(QtWidgets.QMainWindow):
             path['peline'] = peline
             addItem(peline)
 
+        # index the items now, so painting and hit-testing only have to
+        # look at the items near the area in question (Qt picks the
+        # tree depth based on the item count)
+        scene.setItemIndexMethod(QtWidgets.QGraphicsScene.ItemIndexMethod.BspTreeIndex)
 
         # fill up the area list
         self.areaComboBox.clear()
@@ -9600,8 +9704,8 @@ class ReggieWindow(QtWidgets.QMainWindow):
                 else:
                     newVisibility = ShowLayer2
 
+                level.RemoveItems(change)
                 for item in change:
-                    level.RemoveFromLayer(item)
                     item.layer = nl
                     newLayer.append(item)
                     item.setZValue(z)
@@ -9844,11 +9948,8 @@ class ReggieWindow(QtWidgets.QMainWindow):
             sel = self.scene.selectedItems()
             if len(sel) > 0:
                 self.SelectionUpdateFlag = True
-                for obj in sel:
-                    obj.delete()
-                    obj.setSelected(False)
-                    self.scene.removeItem(obj)
-                    self.levelOverview.update()
+                self.DeleteItems(sel)
+                self.levelOverview.update()
                 SetDirty()
                 event.accept()
                 self.SelectionUpdateFlag = False
@@ -10132,6 +10233,10 @@ class ReggieWindow(QtWidgets.QMainWindow):
                 mainWindow.scene.render(RenderPainter, QtCore.QRectF(0,0,Level.zones[i].width*1.5, Level.zones[i].height*1.5), QtCore.QRectF(int(Level.zones[i].objx)*1.5, int(Level.zones[i].objy)*1.5, Level.zones[i].width*1.5, Level.zones[i].height*1.5))
                 RenderPainter.end()
 
+            # (view.render() still paints through the viewport, so drop
+            # any sprite boxes cached at the image's pixel ratio)
+            SpriteEditorItem.BoxPixmaps.clear()
+
             ScreenshotImage.save(fn, 'PNG', 50)
 
 
@@ -10141,6 +10246,11 @@ def main():
 
     global app, mainWindow, settings
 
+    # used by release builds to pre-parse the data files
+    if '-build-data-bundle' in sys.argv:
+        BuildDataBundle()
+        sys.exit(0)
+
     # create an application
 
     # The default high-dpi scaling looks really bad, unfortunately.
@@ -10161,17 +10271,13 @@ def main():
         sys.exit(1)
 
     # load required stuff
-    LoadLevelNames()
-    LoadTilesetNames()
-    LoadObjDescriptions()
-    LoadBgANames()
-    LoadBgBNames()
+    # (other data files are only loaded when they're first needed)
     LoadSpriteData()
     LoadEntranceNames()
-    LoadMusicNames()
     LoadNumberFont()
     LoadNumberFontBold()
     LoadOverrides()
+    LoadEntranceImages()
     sprites.Setup()
 
     # load the settings
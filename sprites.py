@@ -4016,7 +4016,7 @@ def PaintAlphaObject(sprite, painter):
 def PaintBlock(sprite, painter):
     painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
     if Tiles[sprite.tilenum] is not None:
-        painter.drawPixmap(0, 0, Tiles[sprite.tilenum])
+        painter.drawPixmap(0, 0, *Tiles[sprite.tilenum])
     painter.drawPixmap(0, 0, sprite.image)
 
 def PaintWoodenPlatform(sprite, painter):